@@ -0,0 +1,313 @@
+"""
+Benchmarks of the fintualistic plot functions.
+
+Every plot function is run headless on synthetic data of growing size,
+recording the figure build time, the html serialization time, the peak
+memory of both stages and the size of the html file without the
+plotly.js bundle, which is the same for every chart.
+
+    python benchmarks/bench_plots.py --quick
+    python benchmarks/bench_plots.py --save-baseline
+    python benchmarks/bench_plots.py --compare
+    python benchmarks/bench_plots.py --fast-path
+
+--compare flags the cases that got slower or bigger than the stored
+baseline and exits with status 1 if there is any regression.
+--fast-path compares validate=True and validate=False on charts with
+many traces, and exits with status 1 if their html is not the same.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, '..', 'src'))
+
+import fintualistic as fl  # noqa: E402
+
+
+_baseline = os.path.join(_here, 'baseline.json')
+
+_rows = (100, 10000, 1000000, 10000000)
+_columns = (1, 10, 100, 500)
+_quick_rows = (100, 10000)
+_quick_columns = (1, 10)
+
+# cases above this number of cells are skipped
+_max_cells = 10000000
+
+# bars and pie slices are categories, more than this is not a chart
+_max_categories = 100000
+
+# allowed growth over the baseline before flagging a regression
+_tolerance = {
+            'build_seconds': 1.25,
+            'serialize_seconds': 1.25,
+            'peak_bytes': 1.15,
+            'file_bytes': 1.05}
+
+# timing differences below this many seconds are not regressions
+_noise = 0.02
+
+
+def _frame(rows, columns, seed=0):
+    """
+    Random walks with a minute DatetimeIndex.
+    """
+
+    random = np.random.default_rng(seed)
+    values = 100 + random.standard_normal((rows, columns)).cumsum(axis=0)
+    index = pd.date_range('2000-01-01', periods=rows, freq='min')
+    names = ['fund {}'.format(i) for i in range(columns)]
+    return pd.DataFrame(values, index=index, columns=names)
+
+
+def _pair(rows, returns=False):
+    """
+    Two random walks as pandas series, or their returns.
+    """
+
+    data = _frame(rows, 2)
+    if returns:
+        data = data.pct_change()
+    return data.iloc[:, 0], data.iloc[:, 1]
+
+
+def _ohlc(rows):
+    """
+    Candles with open, high, low and close columns.
+    """
+
+    close = _frame(rows, 1).iloc[:, 0]
+    spread = np.random.default_rng(1).random(rows)
+    return pd.DataFrame({
+                'open': close.shift(fill_value=close.iloc[0]),
+                'high': close + spread,
+                'low': close - spread,
+                'close': close})
+
+
+# arguments of every plot function, from the number of rows and columns
+_inputs = {
+        'plot_series': lambda n, m: (_frame(n, m),),
+        'plot_bar': lambda n, m: (_frame(n, m).abs(),),
+        'plot_combo_series': lambda n, m: _pair(n),
+        'plot_pie': lambda n, m: (_frame(n, 1).iloc[:, 0].abs(),),
+        'plot_scatter': lambda n, m: _pair(n, returns=True),
+        'plot_dist': lambda n, m: (_frame(n, m).diff(),),
+        'plot_area': lambda n, m: (_frame(n, m).abs(),),
+        'plot_candlestick': lambda n, m: (_ohlc(n),),
+        'plot_drawdown': lambda n, m: (_frame(n, m).abs(),),
+        'plot_rolling': lambda n, m: (_frame(n, m).abs(),)}
+
+# functions that always plot the same number of series
+_fixed_columns = {
+        'plot_combo_series': 2,
+        'plot_pie': 1,
+        'plot_scatter': 2,
+        'plot_candlestick': 1}
+
+_categorical = ('plot_bar', 'plot_pie')
+
+
+def _cases(rows, columns):
+    """
+    Yields (name, rows, columns) for every benchmark.
+    """
+
+    for name in _inputs:
+        widths = (_fixed_columns[name],) if name in _fixed_columns else columns
+        for n in rows:
+            if name in _categorical and n > _max_categories:
+                continue
+            for m in widths:
+                if n * m <= _max_cells:
+                    yield name, n, m
+
+
+def _run(function, args, path):
+    """
+    Builds and saves one chart, returns the build and serialization
+    times in seconds.
+    """
+
+    start = time.perf_counter()
+    fig = function(*args, save=False, show=False)
+    built = time.perf_counter()
+    fig.write_html(path, include_plotlyjs=False)
+    return built - start, time.perf_counter() - built
+
+
+def run(rows, columns, repeat):
+    """
+    Runs every benchmark and returns a dict with the results by case.
+    """
+
+    results = {}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.html')
+    for name, n, m in _cases(rows, columns):
+        case = '{}[rows={},cols={}]'.format(name, n, m)
+        function = getattr(fl, name)
+        args = _inputs[name](n, m)
+
+        times = [_run(function, args, path) for _ in range(repeat)]
+        gc.collect()
+        tracemalloc.start()
+        _run(function, args, path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results[case] = {
+                    'build_seconds': min(t[0] for t in times),
+                    'serialize_seconds': min(t[1] for t in times),
+                    'peak_bytes': peak,
+                    'file_bytes': os.path.getsize(path)}
+        print('{:<45} build {:8.3f}s  serialize {:8.3f}s  '
+              'peak {:8.1f}MB  file {:8.1f}MB'.format(
+                    case,
+                    results[case]['build_seconds'],
+                    results[case]['serialize_seconds'],
+                    peak / 1e6,
+                    results[case]['file_bytes'] / 1e6), flush=True)
+        del args
+    os.remove(path)
+    os.rmdir(directory)
+    return results
+
+
+# functions with a validate=False fast path, and their many trace cases
+_fast_path = ('plot_series', 'plot_bar', 'plot_area')
+_fast_path_sizes = ((1000, 100), (1000, 500), (24, 300))
+
+
+def fast_path(repeat):
+    """
+    Times the validated and the dict figures of the functions with a
+    fast path and checks that they serialize to the same html.
+    Returns the number of cases where the html differs.
+    """
+
+    import plotly.io as pio
+    from fintualistic.spec import check
+
+    different = 0
+    for name in _fast_path:
+        function = getattr(fl, name)
+        for n, m in _fast_path_sizes:
+            args = _inputs[name](n, m)
+            times = {}
+            html = {}
+            for validate in (True, False):
+                runs = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    fig = function(
+                                *args, save=False, show=False,
+                                validate=validate)
+                    runs.append(time.perf_counter() - start)
+                times[validate] = min(runs)
+                html[validate] = pio.to_html(
+                                        fig,
+                                        include_plotlyjs=False,
+                                        div_id='benchmark',
+                                        validate=False)
+            same = html[True] == html[False] and not check(fig)
+            different += not same
+            print('{:<45} validated {:8.3f}s  dict {:8.3f}s  '
+                  'speedup {:6.1f}x  {}'.format(
+                        '{}[rows={},cols={}]'.format(name, n, m),
+                        times[True],
+                        times[False],
+                        times[True] / times[False],
+                        'same html' if same else 'DIFFERENT HTML'),
+                  flush=True)
+    return different
+
+
+def compare(results, baseline):
+    """
+    Returns the list of regressions against the baseline,
+    cases missing from either side are ignored.
+    """
+
+    regressions = []
+    for case, metrics in results.items():
+        if case not in baseline:
+            continue
+        for metric, limit in _tolerance.items():
+            before = baseline[case][metric]
+            after = metrics[metric]
+            # a few milliseconds are noise
+            if metric.endswith('seconds') and after - before < _noise:
+                continue
+            if before > 0 and after / before > limit:
+                regressions.append((case, metric, before, after))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+                '--quick', action='store_true',
+                help='only the small sizes')
+    parser.add_argument(
+                '--repeat', type=int, default=3,
+                help='runs per case, the fastest is kept')
+    parser.add_argument(
+                '--save-baseline', action='store_true',
+                help='store the results as the new baseline')
+    parser.add_argument(
+                '--compare', action='store_true',
+                help='flag regressions against the baseline')
+    parser.add_argument(
+                '--baseline', default=_baseline,
+                help='path of the baseline json file')
+    parser.add_argument(
+                '--fast-path', action='store_true',
+                help='compare the validate=False fast path instead')
+    options = parser.parse_args()
+
+    # checked first, the full suite runs for a long time
+    if (options.compare and not options.save_baseline and
+            not os.path.exists(options.baseline)):
+        parser.error(
+                'no baseline at {}, run with --save-baseline first'.format(
+                    options.baseline))
+
+    fl.set_headless()
+    if options.fast_path:
+        sys.exit(1 if fast_path(options.repeat) else 0)
+    if options.quick:
+        results = run(_quick_rows, _quick_columns, options.repeat)
+    else:
+        results = run(_rows, _columns, options.repeat)
+
+    if options.save_baseline:
+        with open(options.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('Baseline saved to {}'.format(options.baseline))
+
+    if options.compare:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        for case, metric, before, after in regressions:
+            print('REGRESSION {} {}: {:.4g} -> {:.4g} ({:+.0%})'.format(
+                        case, metric, before, after, after / before - 1))
+        if regressions:
+            sys.exit(1)
+        print('No regressions against {}'.format(options.baseline))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,8 +14,14 @@ setup(
     url='https://github.com/fsuarezb/fintualistic',
     keywords='fintual fintualistic',
     install_requires=[
-          'pandas', 'plotly'
+          'numpy', 'pandas', 'plotly'
       ],
+    extras_require={
+          'export': ['kaleido>=0.2.1']
+      },
+    entry_points={
+          'console_scripts': ['fintualistic=fintualistic.cli:main']
+      },
     # other arguments omitted
     long_description=long_description,
     long_description_content_type='text/markdown'
@@ -1,8 +1,36 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.figure_factory as ff
+import functools
+import logging
+
+from .profiling import Profiler, profiled as _profiled, stage as _stage
+
+# pandas, plotly and numpy are imported inside the functions that use
+# them, so importing fintualistic stays cheap for short lived jobs
+
+_logger = logging.getLogger(__name__)
+
+# public names defined in submodules, loaded on first access
+_lazy_exports = {
+            'downsample': '.downsampling',
+            'render_many': '.batch',
+            'Report': '.report',
+            'ExportEngine': '.export',
+            'LiveSeries': '.live',
+            'RenderCache': '.cache',
+            'Chart': '.chart',
+            'NavStats': '.analytics',
+            'drawdown': '.analytics',
+            'rolling': '.analytics',
+            'set_async_workers': '.aio',
+            'aplot_series': '.aio',
+            'aplot_bar': '.aio',
+            'aplot_combo_series': '.aio',
+            'aplot_pie': '.aio',
+            'aplot_scatter': '.aio',
+            'aplot_dist': '.aio',
+            'aplot_area': '.aio',
+            'aplot_candlestick': '.aio',
+            'aplot_drawdown': '.aio',
+            'aplot_rolling': '.aio'}
 
 
 _color_palette = [
@@ -15,7 +43,512 @@ _color_palette = [
 
 _font_family = 'Helvetica'
 
+_template_name = 'fintualistic'
 
+# set with set_headless, used when the plot functions get show=None
+_headless = False
+
+# set with set_cache, used by the plot functions when saving
+_cache = None
+
+_render_modes = ('auto', 'svg', 'webgl')
+
+_scatter_modes = ('markers', 'density')
+
+# aggregates of the line charts when resampling with freq
+_resample_methods = ('last', 'mean')
+
+_export_formats = ('html', 'json', 'png', 'svg', 'pdf')
+
+# above this number of points 'auto' rendering switches to WebGL
+_webgl_threshold = 50000
+
+
+def _use_webgl(render, n_points):
+    """
+    Returns True if a chart with n_points points
+    has to be rendered with WebGL.
+    """
+
+    if render not in _render_modes:
+        raise ValueError(
+                    "render must be one of {}, got {!r}".format(
+                        _render_modes, render))
+    if render == 'auto':
+        return n_points > _webgl_threshold
+    return render == 'webgl'
+
+
+def _template():
+    """
+    Registers the Fintual style as the plotly template 'fintualistic'
+    the first time it is needed, on top of the default plotly template.
+    Returns the template name.
+    """
+
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    if _template_name not in pio.templates:
+        axis = dict(
+                    zeroline=False,
+                    showline=False,
+                    gridcolor='lightgray')
+        template = go.layout.Template(pio.templates['plotly'])
+        template.layout.update(
+                    colorway=_color_palette,
+                    font_family=_font_family,
+                    plot_bgcolor='#F3F6FA',
+                    paper_bgcolor='#F3F6FA',
+                    margin=dict(l=100, r=100, t=120, b=100),
+                    title_yanchor='top',
+                    xaxis=axis,
+                    yaxis=axis)
+        pio.templates[_template_name] = template
+
+    return _template_name
+
+
+def _ols(x, y):
+    """
+    Closed form ordinary least squares fit of y = slope * x + intercept.
+    Returns slope, intercept and r squared.
+    """
+
+    import numpy as np
+
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    dy = y - y_mean
+    sxx = np.dot(dx, dx)
+    slope = np.dot(dx, dy) / sxx
+    intercept = y_mean - slope * x_mean
+    r2 = slope * slope * sxx / np.dot(dy, dy)
+    return slope, intercept, r2
+
+
+def set_headless(headless=True):
+    """
+    Turns headless mode on or off. In headless mode the plot functions
+    return the figure without calling fig.show(), unless show=True
+    is passed, which saves the display cost in servers and batch jobs.
+    :param headless: boolean, default: True
+        True to stop showing the charts
+    """
+
+    global _headless
+    _headless = headless
+
+
+def set_cache(directory=None, max_bytes=int(1e9), link=False):
+    """
+    Turns the render cache on or off. With the cache on, a plot call that
+    saves without showing is looked up by a hash of its data and
+    arguments. On a hit the saved files are copied from the cache
+    instead of rebuilding the chart, and the figure is loaded from the
+    json stored with them. The least recently used files are evicted
+    when the cache grows over max_bytes.
+    Returns the cache, see RenderCache for its hit and miss counters.
+    :param directory: str, default: None
+        directory of the cache, None turns the cache off
+    :param max_bytes: int, default: 1e9
+        maximum size of the cache in bytes
+    :param link: boolean, default: False
+        True to hard link cached files instead of copying them,
+        linked files are replaced, not overwritten, by later writes
+    """
+
+    global _cache
+    if directory is None:
+        _cache = None
+    else:
+        from .cache import RenderCache
+
+        _cache = RenderCache(directory, max_bytes, link)
+    return _cache
+
+
+def _cached(function):
+    """
+    Decorator that serves the files saved by a plot function
+    from the render cache, see set_cache.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        cache = _cache
+        if cache is None:
+            return function(*args, **kwargs)
+
+        import inspect
+
+        bound = inspect.signature(function).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        show = arguments.pop('show')
+        if show is None:
+            show = not _headless
+        if show or not arguments['save']:
+            return function(*args, **kwargs)
+
+        from .cache import hash_inputs, source_key
+
+        # the first argument is the data
+        data = next(iter(arguments))
+        arguments[data] = source_key(arguments[data])
+        if arguments[data] is None:
+            return function(*args, **kwargs)
+
+        _stage('cache')
+        imgname = arguments.pop('imgname')
+        formats = arguments['export_format']
+        if isinstance(formats, str):
+            formats = (formats,)
+        key = hash_inputs(function.__name__, arguments)
+        fig = cache.fetch(key, formats, imgname)
+        if fig is not None:
+            # the same type as a miss, a dict only with validate=False
+            if arguments.get('validate', True):
+                import plotly.graph_objects as go
+
+                fig = go.Figure(fig)
+            return fig
+        _stage('prep')
+        fig = function(*args, **kwargs)
+        cache.store(key, formats, imgname, fig)
+        return fig
+
+    return wrapper
+
+
+def _x_values(index, compact):
+    """
+    Returns the x values of a trace, in compact mode dates are
+    converted to milliseconds so they can be encoded as a typed array.
+    Other dates without timezone are passed as datetime64, which plotly
+    serializes the same but validates much faster than Timestamps.
+    """
+
+    import pandas as pd
+
+    if compact and isinstance(index, pd.DatetimeIndex):
+        from .encoding import dates_to_ms
+
+        return dates_to_ms(index)
+    if isinstance(index, pd.DatetimeIndex) and index.tz is None:
+        return index.values
+    return index
+
+
+def _output(fig, imgname, save, show, export_format='html', compact=False,
+            post_script=None):
+    """
+    Saves and shows the figure, a plotly figure or a dict built with
+    validate=False, as requested by the plot functions. post_script
+    is javascript added to html files after the plot.
+    Returns the figure.
+    """
+
+    if save:
+        _stage('serialize')
+        import plotly.io as pio
+
+        from .cache import detach
+
+        output = fig
+        if compact:
+            from .encoding import to_compact_dict
+
+            output = to_compact_dict(fig, compact == 'float32')
+
+        if isinstance(export_format, str):
+            export_format = (export_format,)
+        for format in export_format:
+            if format not in _export_formats:
+                raise ValueError(
+                        "export_format must be one of {}, got {!r}".format(
+                            _export_formats, format))
+            # a file linked by the render cache is replaced, not written
+            detach(imgname + '.' + format)
+            if format == 'html':
+                pio.write_html(
+                            output,
+                            imgname + '.html',
+                            validate=False,
+                            post_script=post_script)
+            elif format == 'json':
+                pio.write_json(output, imgname + '.json', validate=False)
+            else:
+                from .export import get_engine
+
+                get_engine().export(fig, imgname + '.' + format, format)
+
+    if show is None:
+        show = not _headless
+    if show:
+        import plotly.io as pio
+
+        _stage('show')
+        pio.show(fig, validate=False)
+
+    return fig
+
+
+def _add_traces(fig, trace_type, traces, validate):
+    """
+    Adds traces, given as dicts of properties, to a figure. Without
+    validation they are returned as plain dicts instead, to build the
+    figure dict once the layout is done, see _figure_dict.
+    """
+
+    if validate:
+        fig.add_traces([dict(props, type=trace_type) for props in traces])
+        return None
+
+    from .spec import trace
+
+    return [trace(trace_type, **props) for props in traces]
+
+
+def _trace_name(name):
+    """
+    Returns a column name as a trace name, plotly only takes strings
+    and numbers, not numpy numbers.
+    """
+
+    if name is None:
+        return None
+    return str(name)
+
+
+def _figure_dict(fig, traces):
+    """
+    Returns the figure dict with the layout of fig and plain dict traces.
+    """
+
+    from .spec import figure
+
+    return figure(fig, traces)
+
+
+def _downsample(series, max_points, method):
+    """
+    Downsamples series with downsample and reports the dropped points.
+    Returns a list with one pandas serie per column.
+    """
+
+    from .downsampling import downsample
+
+    result, dropped = downsample(series, max_points, method)
+    _logger.info(
+                'Downsampled to %s points per serie, %s points dropped',
+                max_points, dropped)
+    return result
+
+
+def _resample(data, freq, method):
+    """
+    Resamples in memory timeseries to buckets of freq with the
+    resample_method of the line charts.
+    """
+
+    from .resampling import resample
+
+    if method not in _resample_methods:
+        raise ValueError(
+                    "resample_method must be one of {}, got {!r}".format(
+                        _resample_methods, method))
+    if _is_stream(data):
+        raise ValueError(
+                    'freq requires a pandas dataframe or serie, '
+                    'streamed sources are not resampled')
+    return resample(data, freq, method)
+
+
+def _is_stream(data):
+    """
+    True if data is a parquet path, a numpy array
+    or an iterator of chunks instead of a pandas dataframe.
+    """
+
+    from .streaming import is_stream
+
+    return is_stream(data)
+
+
+def _reduce_stream(source, max_points, aggregates):
+    """
+    Reduces a source that does not fit in memory with reduce_source,
+    keeping at most max_points points per serie.
+    Returns a list with one pandas serie per column.
+    """
+
+    from .streaming import _default_resolution, has_length, reduce_source
+
+    if max_points is None:
+        resolution = _default_resolution
+    elif has_length(source):
+        # the first row is kept on top of the buckets
+        resolution = max(1, (max_points - 1) // len(aggregates))
+    else:
+        # buckets are only sized up front when the length is known,
+        # otherwise there are up to twice the resolution
+        resolution = max(1, (max_points - 1) // (2 * len(aggregates)))
+    columns = reduce_source(source, resolution, aggregates)
+    _logger.info(
+                'Reduced stream to %s buckets per serie', resolution)
+    return columns
+
+
+def _series_columns(series, max_points, downsample_method, freq,
+                    resample_method):
+    """
+    Resamples, downsamples or reduces the data of the line charts.
+    Returns a list with one pandas serie per column and True if the
+    data is a single pandas serie.
+    """
+
+    import pandas as pd
+
+    if isinstance(series, pd.Series):
+        is_series = True
+        data = series.to_frame(series.name)
+    else:
+        is_series = False
+        data = series
+
+    if freq is not None:
+        data = _resample(data, freq, resample_method)
+
+    if _is_stream(data):
+        columns = _reduce_stream(data, max_points, ('min', 'max', 'last'))
+    elif max_points is None:
+        columns = [data.iloc[:, i] for i in range(data.shape[1])]
+    else:
+        columns = _downsample(data, max_points, downsample_method)
+    return columns, is_series
+
+
+def _combo_columns(serie_1, serie_2, max_points, downsample_method, freq,
+                   resample_method):
+    """
+    Resamples both series of plot_combo_series on a shared index
+    and downsamples them.
+    Returns both series.
+    """
+
+    if freq is not None:
+        import pandas as pd
+
+        both = pd.concat([serie_1, serie_2], axis=1, keys=[0, 1])
+        both = _resample(both, freq, resample_method)
+        serie_1 = both[0].rename(serie_1.name)
+        serie_2 = both[1].rename(serie_2.name)
+
+    if max_points is not None:
+        serie_1, = _downsample(serie_1, max_points, downsample_method)
+        serie_2, = _downsample(serie_2, max_points, downsample_method)
+    return serie_1, serie_2
+
+
+def _series_figure(
+                columns, is_series, title, suptitle, ylabel, xlabel, marker,
+                title_size, label_size, showlegend, legend_size, tick_size,
+                render, merge_traces, validate, compact):
+    """
+    Builds the figure of plot_series from its prepared columns,
+    see _series_columns.
+    Returns the figure and the post script of html files.
+    """
+
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    if marker:
+        mode = 'lines+markers'
+    else:
+        mode = 'lines'
+
+    if _use_webgl(render, sum(len(serie) for serie in columns)):
+        trace_type = 'scattergl'
+    else:
+        trace_type = 'scatter'
+
+    _stage('traces')
+    fig = go.Figure(layout={'template': _template()})
+
+    if merge_traces:
+        from .merging import highlight_script, merge_series
+
+        post_script = highlight_script
+        traces = []
+        merged = merge_series(columns, len(_color_palette))
+        for i, (names, starts, x, y) in enumerate(merged):
+            if len(names) > 1:
+                name = '{} (+{})'.format(names[0], len(names) - 1)
+            else:
+                name = names[0]
+            traces.append(
+                    dict(
+                                x=_x_values(x, compact),
+                                y=y,
+                                name=name,
+                                legendgroup=str(i),
+                                meta={'names': names, 'starts': starts},
+                                hovertemplate='%{x}<br>%{y}<extra></extra>',
+                                mode=mode,
+                                line=dict(
+                                    color=_color_palette[i],
+                                    width=3)))
+        # filled with the hovered serie by highlight_script
+        traces.append(
+                    dict(
+                                x=[],
+                                y=[],
+                                mode='lines',
+                                showlegend=False,
+                                visible=False,
+                                line=dict(width=5)))
+    else:
+        post_script = None
+        traces = []
+        for i, serie in enumerate(columns):
+            name = _trace_name(serie.name)
+            color = _color_palette[i % len(_color_palette)]
+            traces.append(
+                    dict(
+                                x=_x_values(serie.index, compact),
+                                y=serie,
+                                name=name,
+                                mode=mode,
+                                line=dict(
+                                    color=color,
+                                    width=3)))
+    traces = _add_traces(fig, trace_type, traces, validate)
+
+    _stage('layout')
+    header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
+    fig.update_layout(
+                    title={'text': header, 'font_size': title_size},
+                    xaxis_title={'text': xlabel, 'font_size': label_size},
+                    yaxis_title={'text': ylabel, 'font_size': label_size},
+                    xaxis_tickfont_size=tick_size,
+                    yaxis_tickfont_size=tick_size,
+                    legend={'font': {'size': legend_size}}
+                   )
+    if compact and columns and isinstance(
+                            columns[0].index, pd.DatetimeIndex):
+        fig.update_layout(xaxis_type='date')
+    if is_series or showlegend is False:
+        fig.update_layout(showlegend=False)
+    if not validate:
+        fig = _figure_dict(fig, traces)
+    return fig, post_script
+
+
+@_profiled
+@_cached
 def plot_series(
                 series,
                 title='Titulo',
@@ -29,14 +562,31 @@ def plot_series(
                 label_size=22,
                 showlegend=True,
                 legend_size=30,
-                tick_size=20
+                tick_size=20,
+                max_points=None,
+                downsample_method='lttb',
+                freq=None,
+                resample_method='last',
+                render='auto',
+                merge_traces=False,
+                validate=True,
+                export_format='html',
+                compact=False,
+                show=None
                 ):
     """
     Plots a pandas Serie or Dataframe as a line chart,
     columns are going to be displayed as legend.
-    :param series: dataframe
+    Returns the plotly figure.
+    :param series: dataframe, str, numpy array or iterator
         pandas dataframe or series with timeseries,
-        each column represents a serie
+        each column represents a serie. Data that does not fit in
+        memory can be passed as the path of a parquet file,
+        a numpy array (e.g. np.load with mmap_mode='r') or an iterator
+        of consecutive dataframe chunks, it is reduced in one pass to
+        the first row and the minimum, maximum and last point of
+        buckets, at most max_points points (2000 to 4000 buckets
+        if max_points is None)
     :param title: str, default: 'Titulo'
         title of the chart
     :param suptitle: str, default: 'Subtitulo'
@@ -61,69 +611,60 @@ def plot_series(
         Legend font size
     :param tick_size: int, default: 30
         Ticks font size
+    :param max_points: int, default: None
+        maximum number of points per serie, longer series are
+        downsampled before plotting. If None, every point is plotted
+    :param downsample_method: str, default: 'lttb'
+        'lttb' for an approximate Largest Triangle Three Buckets
+        that keeps the global minimum and maximum,
+        'minmax' for the minimum and maximum of every bucket
+    :param freq: str, default: None
+        pandas frequency to resample the series before plotting,
+        e.g. 'W' or 'ME'. If None, the series are not resampled
+    :param resample_method: str, default: 'last'
+        'last' or 'mean' value of every bucket when resampling
+    :param render: str, default: 'auto'
+        'svg', 'webgl' or 'auto', 'auto' uses WebGL
+        when the chart has more than 50000 points
+    :param merge_traces: boolean, default: False
+        True to draw the series of the same color as one trace, with
+        the lines separated by gaps, so the chart has at most one trace
+        per palette color however many series there are. The legend
+        toggles a color group, and in saved html files the series under
+        the mouse is highlighted and named
+    :param validate: boolean, default: True
+        False to build the figure as a plain dict without plotly's
+        validation of every trace, which is much faster for charts with
+        many traces. The saved files are the same, but the function
+        returns the figure dict instead of a plotly figure
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
     """
 
-    if isinstance(series, pd.Series):
-        is_series = True
-        data = series.to_frame(series.name)
-    else:
-        is_series = False
-        data = series.copy()
-
-    n = data.shape[1]
-    x = data.index
-
-    if marker:
-        mode = 'lines+markers'
-    else:
-        mode = 'lines'
-
-    fig = go.Figure()
-
-    for i in range(n):
-        serie = data.iloc[:, i]
-        name = serie.name
-        color = _color_palette[i % len(_color_palette)]
-        fig.add_trace(
-                    go.Scatter(
-                                x=x,
-                                y=serie,
-                                name=name,
-                                mode=mode,
-                                line=dict(
-                                    color=color,
-                                    width=3)))
-
-    header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
-    fig.update_layout(
-                    title={'text': header, 'font_size': title_size},
-                    xaxis_title={'text': xlabel, 'font_size': label_size},
-                    yaxis_title={'text': ylabel, 'font_size': label_size},
-                    font_family=_font_family,
-                    plot_bgcolor='#F3F6FA',
-                    paper_bgcolor='#F3F6FA',
-                    legend={'font': {'size': legend_size}},
-                    margin=dict(l=100, r=100, t=120, b=100),
-                    title_yanchor='top'
-                   )
+    columns, is_series = _series_columns(
+                                series, max_points, downsample_method,
+                                freq, resample_method)
 
-    fig.update_xaxes(
-                    zeroline=False,
-                    gridcolor='lightgray',
-                    tickfont={"size": tick_size})
-    fig.update_yaxes(
-                    zeroline=False,
-                    gridcolor='lightgray',
-                    tickfont={"size": tick_size})
-    if is_series or showlegend is False:
-        fig.update_layout(showlegend=False)
+    fig, post_script = _series_figure(
+                columns, is_series, title, suptitle, ylabel, xlabel, marker,
+                title_size, label_size, showlegend, legend_size, tick_size,
+                render, merge_traces, validate, compact)
 
-    if save:
-        fig.write_html(imgname + '.html')
-
-    fig.show()
+    return _output(
+                fig, imgname, save, show, export_format, compact,
+                post_script)
 
 
+@_profiled
+@_cached
 def plot_bar(
             data,
             title='Titulo',
@@ -137,11 +678,18 @@ def plot_bar(
             legend_size=30,
             tick_size=20,
             stacked=False,
-            bar_labels=True
+            bar_labels=True,
+            top=None,
+            others_label='Others',
+            validate=True,
+            export_format='html',
+            compact=False,
+            show=None
             ):
     """
     Plots a pandas Serie or Dataframe as a bar chart,
     columns are going to be displayed as legend.
+    Returns the plotly figure.
     :param data: pandas dataframe or series
         dataframe or series with the data to plot
     :param title: str, default: 'Titulo'
@@ -168,30 +716,76 @@ def plot_bar(
         True for stacked bars, False for group
     :param bar_labels: boolean, default: False
         True for showing bar labels, False for group
+    :param top: int, default: None
+        number of categories (rows) to plot, the ones with the largest
+        total absolute value. The rest are summed in a last bar.
+        If None, every category is plotted
+    :param others_label: str, default: 'Others'
+        name of the bar with the sum of the other categories
+    :param validate: boolean, default: True
+        False to build the figure as a plain dict without plotly's
+        validation of every trace, which is much faster for charts with
+        many traces. The saved files are the same, but the function
+        returns the figure dict instead of a plotly figure
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
     """
 
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    from .bars import si_labels, top_categories
+
     if stacked:
         barmode = 'relative'
     else:
         barmode = 'group'
 
-    if bar_labels:
-        bar_label_text = '.3s'
-    else:
-        bar_label_text = False
-
     if isinstance(data, pd.Series):
         is_series = True
         data = data.to_frame(data.name)
     else:
         is_series = False
 
-    fig = px.bar(
-                data,
-                barmode=barmode,
-                color_discrete_sequence=_color_palette,
-                text_auto=bar_label_text
-                )
+    if top is not None:
+        data = top_categories(data, top, others_label)
+
+    _stage('traces')
+    fig = go.Figure(layout={'template': _template()})
+
+    # one trace per column from its array, without melting the frame
+    x = _x_values(data.index, compact)
+    values = data.to_numpy(dtype='float64')
+    if bar_labels:
+        labels = si_labels(values)
+    hover = 'variable={}<br>{}=%{{x}}<br>value=%{{y}}<extra></extra>'
+    index_name = data.index.name or 'index'
+    traces = []
+    for i, name in enumerate(data.columns):
+        color = _color_palette[i % len(_color_palette)]
+        traces.append(
+                    dict(
+                        x=x,
+                        y=values[:, i],
+                        name=str(name),
+                        legendgroup=str(name),
+                        offsetgroup=str(name),
+                        marker=dict(color=color),
+                        text=labels[:, i].tolist() if bar_labels else None,
+                        textposition='auto',
+                        textfont=dict(size=label_size),
+                        hovertemplate=hover.format(name, index_name)))
+    traces = _add_traces(fig, 'bar', traces, validate)
+
+    _stage('layout')
     header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
     fig.update_layout(
                     title={
@@ -200,79 +794,33 @@ def plot_bar(
                             },
                     xaxis_title={'text': xlabel, 'font_size': label_size},
                     yaxis_title={'text': ylabel, 'font_size': label_size},
-                    font_family=_font_family,
-                    plot_bgcolor='#F3F6FA',
-                    paper_bgcolor='#F3F6FA',
+                    xaxis_tickfont_size=tick_size,
+                    yaxis_tickfont_size=tick_size,
                     legend={'font': {'size': legend_size}, 'title': None},
-                    margin=dict(l=100, r=100, t=120, b=100),
-                    title_yanchor='top'
+                    barmode=barmode
                    )
+    if compact and isinstance(data.index, pd.DatetimeIndex):
+        fig.update_layout(xaxis_type='date')
     if is_series:
         fig.update_layout(showlegend=False)
+    if not validate:
+        fig = _figure_dict(fig, traces)
 
-    fig.update_traces(textfont_size=label_size)
-
-    fig.update_xaxes(
-                    zeroline=False,
-                    gridcolor='lightgray',
-                    tickfont={"size": tick_size})
-    fig.update_yaxes(
-                    zeroline=False,
-                    gridcolor='lightgray',
-                    tickfont={"size": tick_size}
-                    )
-    if save:
-        fig.write_html(imgname + '.html')
-    fig.show()
+    return _output(
+                fig, imgname, save, show, export_format, compact)
 
 
-def plot_combo_series(
-                serie_1,
-                serie_2,
-                title='Titulo',
-                suptitle='Subtitulo',
-                ylabel1=None,
-                ylabel2=None,
-                xlabel='xlabel',
-                imgname='fintualistic',
-                save=True,
-                marker=False,
-                title_size=35,
-                label_size=22,
-                tick_size=20
-                ):
+def _combo_figure(
+                serie_1, serie_2, title, suptitle, ylabel1, ylabel2, xlabel,
+                marker, title_size, label_size, tick_size):
     """
-    Plots two pandas Series as line charts, both in differente axis.
-    :param serie_1: pandas serie
-        serie with the first timeseries to plot
-    :param serie_2: pandas serie
-        serie with the second timeseries to plot
-    :param title: str, default: 'Titulo'
-        title of the chart
-    :param suptitle: str, default: 'Subtitulo'
-        suptitle of the chat
-    :param ylabel1: str, default: None
-        y label of the first timeserie,
-        if None, the name of the pandas serie is used
-    :param ylabel2: str, default: None
-        y label of the second timeserie,
-        if None, the name of the pandas serie is used
-    :param xlabel: str, default: 'xlabel'
-        x label of the chat
-    :param imgname: str, default: 'fintualistic'
-        name of the html file
-    :param save: boolean, default: True
-        True if you want to save an html file
-    :param marker: boolean, default: False
-        True if you want circle markers on the line
-    :param title_size: int, default: 35
-        Title font size
-    :param label_size: int, default: 22
-        Axis labels font size
-    :param tick_size: int, default: 30
-        Ticks font size
+    Builds the figure of plot_combo_series from its prepared series,
+    see _combo_columns.
     """
 
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
     if marker:
         mode = 'lines+markers'
     else:
@@ -284,10 +832,15 @@ def plot_combo_series(
     if ylabel2 is None:
         ylabel2 = serie_2.name
 
+    x_1 = serie_1.index
+    x_2 = serie_2.index
+
+    _stage('traces')
     fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.update_layout(template=_template())
     fig.add_trace(
                 go.Scatter(
-                    x=serie_1.index,
+                    x=x_1,
                     y=serie_1,
                     mode=mode,
                     line=dict(
@@ -298,7 +851,7 @@ def plot_combo_series(
 
     fig.add_trace(
                 go.Scatter(
-                    x=serie_1.index,
+                    x=x_2,
                     y=serie_2,
                     mode=mode,
                     line=dict(
@@ -307,48 +860,129 @@ def plot_combo_series(
                 secondary_y=True
                 )
 
+    _stage('layout')
     header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
 
     fig.update_layout(
                     title={'text': header, 'font_size': title_size},
                     xaxis_title={'text': xlabel, 'font_size': label_size},
+                    xaxis_tickfont_size=tick_size,
                     yaxis=dict(
                                 title=ylabel1,
                                 titlefont=dict(
                                         color=_color_palette[0],
                                         size=tick_size),
-                                tickfont=dict(color=_color_palette[0])),
+                                tickfont=dict(
+                                        color=_color_palette[0],
+                                        size=tick_size),
+                                zerolinecolor='#F3F6FA'),
                     yaxis2=dict(
                                 title=ylabel2,
                                 titlefont=dict(
                                         color=_color_palette[1],
                                         size=tick_size),
-                                tickfont=dict(color=_color_palette[1])),
-                    font_family=_font_family,
-                    plot_bgcolor='#F3F6FA',
-                    paper_bgcolor='#F3F6FA',
-                    showlegend=False,
-                    margin=dict(l=100, r=100, t=120, b=100),
-                    title_yanchor='top')
+                                tickfont=dict(
+                                        color=_color_palette[1],
+                                        size=tick_size),
+                                zerolinecolor='#F3F6FA',
+                                showgrid=False),
+                    showlegend=False)
+    return fig
 
-    fig.update_xaxes(
-                    zeroline=False,
-                    gridcolor='lightgray',
-                    tickfont={"size": tick_size})
-    fig.update_yaxes(
-                    zeroline=False,
-                    gridcolor='lightgray',
-                    zerolinecolor='#F3F6FA',
-                    tickfont={"size": tick_size})
 
-    fig['layout']['yaxis2']['showgrid'] = False
+@_profiled
+@_cached
+def plot_combo_series(
+                serie_1,
+                serie_2,
+                title='Titulo',
+                suptitle='Subtitulo',
+                ylabel1=None,
+                ylabel2=None,
+                xlabel='xlabel',
+                imgname='fintualistic',
+                save=True,
+                marker=False,
+                title_size=35,
+                label_size=22,
+                tick_size=20,
+                max_points=None,
+                downsample_method='lttb',
+                freq=None,
+                resample_method='last',
+                export_format='html',
+                compact=False,
+                show=None
+                ):
+    """
+    Plots two pandas Series as line charts, both in differente axis.
+    Returns the plotly figure.
+    :param serie_1: pandas serie
+        serie with the first timeseries to plot
+    :param serie_2: pandas serie
+        serie with the second timeseries to plot
+    :param title: str, default: 'Titulo'
+        title of the chart
+    :param suptitle: str, default: 'Subtitulo'
+        suptitle of the chat
+    :param ylabel1: str, default: None
+        y label of the first timeserie,
+        if None, the name of the pandas serie is used
+    :param ylabel2: str, default: None
+        y label of the second timeserie,
+        if None, the name of the pandas serie is used
+    :param xlabel: str, default: 'xlabel'
+        x label of the chat
+    :param imgname: str, default: 'fintualistic'
+        name of the html file
+    :param save: boolean, default: True
+        True if you want to save an html file
+    :param marker: boolean, default: False
+        True if you want circle markers on the line
+    :param title_size: int, default: 35
+        Title font size
+    :param label_size: int, default: 22
+        Axis labels font size
+    :param tick_size: int, default: 30
+        Ticks font size
+    :param max_points: int, default: None
+        maximum number of points per serie, longer series are
+        downsampled before plotting. If None, every point is plotted
+    :param downsample_method: str, default: 'lttb'
+        'lttb' for an approximate Largest Triangle Three Buckets
+        that keeps the global minimum and maximum,
+        'minmax' for the minimum and maximum of every bucket
+    :param freq: str, default: None
+        pandas frequency to resample both series on a shared index,
+        e.g. 'W' or 'ME'. If None, the series are not resampled
+    :param resample_method: str, default: 'last'
+        'last' or 'mean' value of every bucket when resampling
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
+    """
+
+    serie_1, serie_2 = _combo_columns(
+                                serie_1, serie_2, max_points,
+                                downsample_method, freq, resample_method)
 
-    if save:
-        fig.write_html(imgname + '.html')
+    fig = _combo_figure(
+                serie_1, serie_2, title, suptitle, ylabel1, ylabel2, xlabel,
+                marker, title_size, label_size, tick_size)
 
-    fig.show()
+    return _output(
+                fig, imgname, save, show, export_format, compact)
 
 
+@_profiled
+@_cached
 def plot_pie(
                 serie,
                 title='Titulo',
@@ -357,9 +991,13 @@ def plot_pie(
                 save=True,
                 title_size=35,
                 label_size=22,
+                export_format='html',
+                compact=False,
+                show=None
                 ):
     """
     Plots a pandas Serie as a pie chart with labels.
+    Returns the plotly figure.
     :param series: dataframe
         dataframe with series, each column represents a serie
     :param title: str, default: 'Titulo'
@@ -374,14 +1012,28 @@ def plot_pie(
         Title font size
     :param label_size: int, default: 22
         Axis labels font size
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
     """
 
+    import plotly.graph_objects as go
+
+    _stage('traces')
     fig = go.Figure(
                     data=[
                             go.Pie(
                                     labels=serie.index,
                                     values=serie.round(2),
-                                    hole=.5)])
+                                    hole=.5)],
+                    layout={'template': _template()})
     fig.update_traces(
                     hoverinfo='label+percent',
                     textfont_size=label_size,
@@ -393,23 +1045,19 @@ def plot_pie(
                     textposition='outside',
                     textinfo='value+label')
 
+    _stage('layout')
     header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
 
     fig.update_layout(
                     title={'text': header, 'font_size': title_size},
-                    font_family=_font_family,
-                    plot_bgcolor='#F3F6FA',
-                    paper_bgcolor='#F3F6FA',
-                    showlegend=False,
-                    margin=dict(l=100, r=100, t=120, b=100),
-                    title_yanchor='top')
-
-    if save:
-        fig.write_html(imgname + '.html')
+                    showlegend=False)
 
-    fig.show()
+    return _output(
+                fig, imgname, save, show, export_format, compact)
 
 
+@_profiled
+@_cached
 def plot_scatter(
                 serie_1,
                 serie_2,
@@ -422,10 +1070,17 @@ def plot_scatter(
                 save=True,
                 title_size=35,
                 label_size=22,
-                tick_size=20
+                tick_size=20,
+                render='auto',
+                mode='markers',
+                bins=100,
+                export_format='html',
+                compact=False,
+                show=None
                 ):
     """
     Plots two pandas Series in a scatter plot, regression line is optional.
+    Returns the plotly figure.
     :param serie_1: pandas serie
         serie with the first series to plot, axis x
     :param serie_2: pandas serie
@@ -452,65 +1107,122 @@ def plot_scatter(
         Axis labels font size
     :param tick_size: int, default: 30
         Ticks font size
+    :param render: str, default: 'auto'
+        'svg', 'webgl' or 'auto', 'auto' uses WebGL
+        when the chart has more than 50000 points
+    :param mode: str, default: 'markers'
+        'markers' plots every point, 'density' plots a heatmap with
+        the number of points in every cell, its size does not depend
+        on the number of points
+    :param bins: int, default: 100
+        number of bins per axis in density mode
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
     """
 
+    import numpy as np
+    import plotly.graph_objects as go
+
+    from .density import histogram2d
+
+    if mode not in _scatter_modes:
+        raise ValueError(
+                    "mode must be one of {}, got {!r}".format(
+                        _scatter_modes, mode))
+
     if xlabel is None:
         xlabel = serie_1.name
 
     if ylabel is None:
         ylabel = serie_2.name
 
-    if regression_line:
-        regression_line = 'ols'
-    else:
-        regression_line = None
+    if not serie_1.index.equals(serie_2.index):
+        serie_1, serie_2 = serie_1.align(serie_2, join='inner')
 
-    df = pd.DataFrame([serie_1, serie_2])
-    df = df.T
+    x = np.asarray(serie_1, dtype='float64')
+    y = np.asarray(serie_2, dtype='float64')
+    valid = np.isfinite(x) & np.isfinite(y)
+    if not valid.all():
+        x = x[valid]
+        y = y[valid]
 
-    fig = px.scatter(
-                    df,
-                    x=serie_1.name,
-                    y=serie_2.name,
-                    trendline=regression_line,
-                    trendline_color_override=_color_palette[0],
-                    opacity=0.3)
+    _stage('traces')
+    fig = go.Figure(layout={'template': _template()})
 
+    if mode == 'density':
+        x_centers, y_centers, counts = histogram2d(x, y, bins)
+        fig.add_trace(
+                    go.Heatmap(
+                            x=x_centers,
+                            y=y_centers,
+                            z=counts,
+                            colorscale=[
+                                    [0, _color_palette[1]],
+                                    [0.5, _color_palette[0]],
+                                    [1, _color_palette[5]]],
+                            showscale=False,
+                            hovertemplate=(
+                                '{}=%{{x}}<br>{}=%{{y}}<br>'
+                                'count=%{{z}}<extra></extra>').format(
+                                    xlabel, ylabel)))
+    else:
+        if _use_webgl(render, len(x)):
+            scatter = go.Scattergl
+        else:
+            scatter = go.Scatter
+        fig.add_trace(
+                    scatter(
+                        x=x,
+                        y=y,
+                        mode='markers',
+                        marker=dict(color=_color_palette[0], opacity=0.3),
+                        hovertemplate=(
+                            '{}=%{{x}}<br>{}=%{{y}}<extra></extra>').format(
+                                xlabel, ylabel)))
+
+    if regression_line and len(x) > 1:
+        slope, intercept, r2 = _ols(x, y)
+        x_line = np.array([x.min(), x.max()])
+        fig.add_trace(
+                    go.Scatter(
+                        x=x_line,
+                        y=slope * x_line + intercept,
+                        mode='lines',
+                        line=dict(color=_color_palette[0]),
+                        hovertemplate=(
+                            'y = {:.4g} * x + {:.4g}<br>'
+                            'R<sup>2</sup>={:.4f}<extra></extra>').format(
+                                slope, intercept, r2)))
+
+    _stage('layout')
     header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
 
     fig.update_layout(
                     title={'text': header, 'font_size': title_size},
                     xaxis=dict(
                                 title=xlabel,
-                                titlefont=dict(size=label_size)),
+                                titlefont=dict(size=label_size),
+                                tickfont=dict(size=tick_size)),
                     yaxis=dict(
                                 title=ylabel,
-                                titlefont=dict(size=label_size)),
-                    font_family=_font_family,
-                    plot_bgcolor='#F3F6FA',
-                    paper_bgcolor='#F3F6FA',
-                    showlegend=False,
-                    margin=dict(l=100, r=100, t=120, b=100),
-                    title_yanchor='top')
-    fig.update_traces(marker=dict(color=_color_palette[0]))
-
-    fig.update_xaxes(
-                    showline=False,
-                    gridcolor='lightgray',
-                    zeroline=False,
-                    tickfont={"size": tick_size})
-    fig.update_yaxes(
-                    showline=False,
-                    gridcolor='lightgray',
-                    zeroline=False,
-                    tickfont={"size": tick_size})
-
-    if save:
-        fig.write_html(imgname + '.html')
+                                titlefont=dict(size=label_size),
+                                tickfont=dict(size=tick_size)),
+                    showlegend=False)
 
-    fig.show()
+    return _output(
+                fig, imgname, save, show, export_format, compact)
 
 
+@_profiled
+@_cached
 def plot_dist(
                 series,
                 show_curve=True,
@@ -524,15 +1236,21 @@ def plot_dist(
                 title_size=35,
                 label_size=22,
                 tick_size=20,
-                legend_size=30
+                legend_size=30,
+                export_format='html',
+                compact=False,
+                show=None
                 ):
     """
     Plots a pandas Dataframe or Serie as a distribution plot.
+    Histograms and density curves are computed on fixed bins and grids,
+    so the figure size does not depend on the number of samples.
+    Returns the plotly figure.
     :param series: pandas dataframe o serie
         dataframe with the distributions,
         every column is a distribution, also a serie can be passed
     :param show_curve: bool, default: True
-        True for plotting the histogram line
+        True for plotting the kernel density curve
     :param show_bars: bool, default: True
         True for plotting the histogram bars
     :param title: str, default: 'Titulo'
@@ -555,61 +1273,89 @@ def plot_dist(
         Ticks font size
     :param legend_size: int, default: 30
         Legend font size
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
     """
 
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    from .density import distributions
+
     if isinstance(series, pd.Series):
         is_series = True
         data = series.to_frame(series.name)
     else:
         is_series = False
-        data = series.copy()
+        data = series
 
-    fig = ff.create_distplot(
-                [data[c] for c in data.columns],
-                data.columns,
-                show_rug=False,
-                colors=_color_palette,
-                bin_size=data.std()/8,
-                show_hist=show_bars,
-                show_curve=show_curve)
+    results = distributions(data)
 
+    _stage('traces')
+    fig = go.Figure(layout={'template': _template()})
+    for i, (hist, curve) in enumerate(results):
+        name = _trace_name(data.columns[i])
+        color = _color_palette[i % len(_color_palette)]
+        if show_bars and hist is not None:
+            centers, density = hist
+            fig.add_trace(
+                        go.Bar(
+                            x=centers,
+                            y=density,
+                            width=centers[1] - centers[0]
+                            if len(centers) > 1 else None,
+                            name=name,
+                            legendgroup=str(name),
+                            opacity=0.7,
+                            marker_color=color))
+        if show_curve and curve is not None:
+            grid, density = curve
+            fig.add_trace(
+                        go.Scatter(
+                            x=grid,
+                            y=density,
+                            name=name,
+                            legendgroup=str(name),
+                            showlegend=not show_bars,
+                            mode='lines',
+                            marker_color=color))
+
+    _stage('layout')
     header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
 
     fig.update_layout(
                     title={'text': header, 'font_size': title_size},
+                    template=_template(),
                     xaxis=dict(
                                 title=xlabel,
                                 titlefont=dict(size=label_size)),
                     yaxis=dict(
                                 title=ylabel,
                                 titlefont=dict(size=label_size)),
-                    font_family=_font_family,
-                    plot_bgcolor='#F3F6FA',
-                    paper_bgcolor='#F3F6FA',
                     showlegend=True,
                     legend={'font': {'size': legend_size}},
-                    margin=dict(l=100, r=100, t=120, b=100),
-                    title_yanchor='top')
+                    barmode='overlay',
+                    bargap=0)
 
-    fig.update_xaxes(
-                    showline=False,
-                    gridcolor='lightgray',
-                    zeroline=False,
-                    tickfont={"size": tick_size})
-    fig.update_yaxes(
-                    showline=False,
-                    gridcolor='lightgray',
-                    zeroline=False,
-                    tickfont={"size": tick_size})
+    fig.update_xaxes(tickfont={"size": tick_size})
+    fig.update_yaxes(tickfont={"size": tick_size})
     if is_series:
         fig.update_layout(showlegend=False)
 
-    if save:
-        fig.write_html(imgname + '.html')
-
-    fig.show()
+    return _output(
+                fig, imgname, save, show, export_format, compact)
 
 
+@_profiled
+@_cached
 def plot_area(
                 series,
                 title='Titulo',
@@ -621,13 +1367,30 @@ def plot_area(
                 title_size=35,
                 label_size=22,
                 legend_size=30,
-                tick_size=20
+                tick_size=20,
+                max_points=None,
+                downsample_method='lttb',
+                precompute=False,
+                normalize=False,
+                other_threshold=None,
+                other_label='Other',
+                validate=True,
+                export_format='html',
+                compact=False,
+                show=None
                 ):
     """
     Plots a pandas Serie or Dataframe as an area chart. Stacking is optional.
-    :param series: dataframe
+    Returns the plotly figure.
+    :param series: dataframe, str, numpy array or iterator
         pandas dataframe or series with timeseries,
-        each column represents a serie
+        each column represents a serie. Data that does not fit in
+        memory can be passed as the path of a parquet file,
+        a numpy array (e.g. np.load with mmap_mode='r') or an iterator
+        of consecutive dataframe chunks, it is reduced in one pass to
+        the first row and the last point of buckets, at most
+        max_points points (2000 to 4000 buckets if max_points is None),
+        so the series share their x values and stay stacked
     :param title: str, default: 'Titulo'
         title of the chart
     :param suptitle: str, default: 'Subtitulo'
@@ -648,58 +1411,513 @@ def plot_area(
         Legend font size
     :param tick_size: int, default: 30
         Ticks font size
+    :param max_points: int, default: None
+        maximum number of points per serie, longer series are
+        downsampled before plotting. If None, every point is plotted
+    :param downsample_method: str, default: 'lttb'
+        'lttb' for an approximate Largest Triangle Three Buckets
+        that keeps the global minimum and maximum,
+        'minmax' for the minimum and maximum of every bucket
+    :param precompute: boolean, default: False
+        True to compute the stacks once with numpy and plot them as
+        filled bands, instead of stacking in the browser on every
+        redraw. Downsampling keeps the same rows in every band
+    :param normalize: boolean, default: False
+        True to stack the shares of every row, in percent
+    :param other_threshold: float, default: None
+        series that add up to less than this share of the total,
+        e.g. 0.01, are summed in a single band
+    :param other_label: str, default: 'Other'
+        name of the band with the sum of the small series
+    :param validate: boolean, default: True
+        False to build the figure as a plain dict without plotly's
+        validation of every trace, which is much faster for charts with
+        many traces. The saved files are the same, but the function
+        returns the figure dict instead of a plotly figure
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
     """
 
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    from .stacking import collapse_small, stack
+
     if isinstance(series, pd.Series):
-        is_series = True
         data = series.to_frame(series.name)
     else:
-        is_series = False
-        data = series.copy()
-
-    n = data.shape[1]
-    x = data.index
-
-    fig = go.Figure()
-
-    for i in range(n):
-        serie = data.iloc[:, i]
-        name = serie.name
-        color = _color_palette[i % len(_color_palette)]
-        fig.add_trace(
-                    go.Scatter(
+        data = series
+
+    if _is_stream(data):
+        data = pd.concat(
+                    _reduce_stream(data, max_points, ('last',)), axis=1)
+        max_points = None
+
+    if other_threshold is not None:
+        data = collapse_small(data, other_threshold, other_label)
+
+    if precompute:
+        values, stacks = stack(data, normalize)
+        index = data.index
+        if max_points is not None and data.shape[1]:
+            # rows picked on the top of the stack, the same for every band
+            top, = _downsample(
+                        pd.Series(stacks[:, -1]),
+                        max_points,
+                        downsample_method)
+            rows = top.index.to_numpy()
+            index = index[rows]
+            values = values[rows]
+            stacks = stacks[rows]
+    elif max_points is None:
+        columns = [data.iloc[:, i] for i in range(data.shape[1])]
+    else:
+        columns = _downsample(data, max_points, downsample_method)
+
+    _stage('traces')
+    fig = go.Figure(layout={'template': _template()})
+
+    if precompute:
+        x = _x_values(index, compact)
+        if normalize:
+            hover = '%{customdata:.1f}%'
+        else:
+            hover = '%{customdata:.4g}'
+        traces = []
+        for i, name in enumerate(data.columns):
+            color = _color_palette[i % len(_color_palette)]
+            traces.append(
+                    dict(
                         x=x,
+                        y=stacks[:, i],
+                        customdata=values[:, i],
+                        name=str(name),
+                        mode='lines',
+                        fill='tonexty' if i else 'tozeroy',
+                        hovertemplate=hover,
+                        line=dict(
+                            color=color,
+                            width=0.1)
+                            ))
+    else:
+        traces = []
+        for i, serie in enumerate(columns):
+            name = _trace_name(serie.name)
+            color = _color_palette[i % len(_color_palette)]
+            traces.append(
+                    dict(
+                        x=_x_values(serie.index, compact),
                         y=serie,
                         name=name,
                         stackgroup='one',
+                        groupnorm='percent' if normalize else None,
                         line=dict(
                             color=color,
                             width=0.1)
                             ))
+    traces = _add_traces(fig, 'scatter', traces, validate)
 
+    _stage('layout')
     header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
     fig.update_layout(
                     title={'text': header, 'font_size': title_size},
                     xaxis_title={'text': xlabel, 'font_size': label_size},
                     yaxis_title={'text': ylabel, 'font_size': label_size},
-                    font_family=_font_family,
-                    plot_bgcolor='#F3F6FA',
-                    paper_bgcolor='#F3F6FA',
-                    legend={'font': {'size': legend_size}},
-                    margin=dict(l=100, r=100, t=120, b=100),
-                    title_yanchor='top'
+                    xaxis_tickfont_size=tick_size,
+                    yaxis_tickfont_size=tick_size,
+                    legend={'font': {'size': legend_size}}
                    )
+    if compact and isinstance(data.index, pd.DatetimeIndex):
+        fig.update_layout(xaxis_type='date')
+    if not validate:
+        fig = _figure_dict(fig, traces)
 
-    fig.update_xaxes(
-                    showline=False,
-                    gridcolor='lightgray',
-                    zeroline=False,
-                    tickfont={"size": tick_size})
-    fig.update_yaxes(
-                    showline=False,
-                    gridcolor='lightgray',
-                    zeroline=False,
-                    tickfont={"size": tick_size})
-    if save:
-        fig.write_html(imgname + '.html')
-    fig.show()
+    return _output(
+                fig, imgname, save, show, export_format, compact)
+
+
+@_profiled
+@_cached
+def plot_candlestick(
+                data,
+                title='Titulo',
+                suptitle='Subtitulo',
+                ylabel='ylabel',
+                xlabel='xlabel',
+                imgname='fintualistic',
+                save=True,
+                title_size=35,
+                label_size=22,
+                tick_size=20,
+                freq=None,
+                export_format='html',
+                compact=False,
+                show=None
+                ):
+    """
+    Plots prices as a candlestick chart.
+    Returns the plotly figure.
+    :param data: pandas dataframe or serie
+        serie of prices with a DatetimeIndex, or dataframe with open,
+        high, low and close columns
+    :param title: str, default: 'Titulo'
+        title of the chart
+    :param suptitle: str, default: 'Subtitulo'
+        suptitle of the chat
+    :param ylabel: str, default: 'ylabel'
+        y label of the chat
+    :param xlabel: str, default: 'xlabel'
+        x label of the chat
+    :param imgname: str, default: 'fintualistic'
+        name of the html file
+    :param save: boolean, default: True
+        True if you want to save an html file
+    :param title_size: int, default: 35
+        Title font size
+    :param label_size: int, default: 22
+        Axis labels font size
+    :param tick_size: int, default: 30
+        Ticks font size
+    :param freq: str, default: None
+        pandas frequency of the candles, e.g. 'D', 'W' or 'ME'.
+        Required for a serie of prices, if None a dataframe
+        is plotted as it is
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
+    """
+
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    from .resampling import ohlc
+
+    candles = ohlc(data, freq)
+
+    _stage('traces')
+    fig = go.Figure(layout={'template': _template()})
+    fig.add_trace(
+                go.Candlestick(
+                    x=_x_values(candles.index, compact),
+                    open=candles['open'].to_numpy(),
+                    high=candles['high'].to_numpy(),
+                    low=candles['low'].to_numpy(),
+                    close=candles['close'].to_numpy(),
+                    increasing=dict(
+                            line_color=_color_palette[3],
+                            fillcolor=_color_palette[3]),
+                    decreasing=dict(
+                            line_color=_color_palette[4],
+                            fillcolor=_color_palette[4])))
+
+    _stage('layout')
+    header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
+    fig.update_layout(
+                    title={'text': header, 'font_size': title_size},
+                    xaxis_title={'text': xlabel, 'font_size': label_size},
+                    yaxis_title={'text': ylabel, 'font_size': label_size},
+                    xaxis_tickfont_size=tick_size,
+                    yaxis_tickfont_size=tick_size,
+                    xaxis_rangeslider_visible=False,
+                    showlegend=False
+                   )
+    if compact and isinstance(candles.index, pd.DatetimeIndex):
+        fig.update_layout(xaxis_type='date')
+
+    return _output(
+                fig, imgname, save, show, export_format, compact)
+
+
+def _nav_stats(nav, periods_per_year=None):
+    """
+    Returns nav as a NavStats, reusing it if it already is one.
+    """
+
+    from .analytics import NavStats
+
+    if isinstance(nav, NavStats):
+        return nav
+    return NavStats(nav, periods_per_year)
+
+
+def _stats_chart(
+                data, fill, tickformat, title, suptitle, ylabel, xlabel,
+                title_size, label_size, showlegend, legend_size, tick_size,
+                max_points, downsample_method, render, validate, compact):
+    """
+    Builds the line chart of plot_drawdown and plot_rolling.
+    Returns the plotly figure, or the figure dict without validation.
+    """
+
+    import pandas as pd
+    import plotly.graph_objects as go
+
+    columns, is_series = _series_columns(
+                                data, max_points, downsample_method,
+                                None, 'last')
+    if _use_webgl(render, sum(len(serie) for serie in columns)):
+        trace_type = 'scattergl'
+    else:
+        trace_type = 'scatter'
+
+    _stage('traces')
+    fig = go.Figure(layout={'template': _template()})
+    traces = []
+    for i, serie in enumerate(columns):
+        traces.append(
+                dict(
+                            x=_x_values(serie.index, compact),
+                            y=serie,
+                            name=_trace_name(serie.name),
+                            mode='lines',
+                            fill=fill,
+                            line=dict(
+                                color=_color_palette[i % len(_color_palette)],
+                                width=3)))
+    traces = _add_traces(fig, trace_type, traces, validate)
+
+    _stage('layout')
+    header = '<b>{}</b> <br><sup>{}</sup>'.format(title, suptitle)
+    fig.update_layout(
+                    title={'text': header, 'font_size': title_size},
+                    xaxis_title={'text': xlabel, 'font_size': label_size},
+                    yaxis_title={'text': ylabel, 'font_size': label_size},
+                    xaxis_tickfont_size=tick_size,
+                    yaxis_tickfont_size=tick_size,
+                    yaxis_tickformat=tickformat,
+                    legend={'font': {'size': legend_size}}
+                   )
+    if compact and columns and isinstance(
+                            columns[0].index, pd.DatetimeIndex):
+        fig.update_layout(xaxis_type='date')
+    if is_series or showlegend is False:
+        fig.update_layout(showlegend=False)
+    if not validate:
+        fig = _figure_dict(fig, traces)
+    return fig
+
+
+@_profiled
+@_cached
+def plot_drawdown(
+                nav,
+                title='Titulo',
+                suptitle='Subtitulo',
+                ylabel='ylabel',
+                xlabel='xlabel',
+                imgname='fintualistic',
+                save=True,
+                title_size=35,
+                label_size=22,
+                showlegend=True,
+                legend_size=30,
+                tick_size=20,
+                max_points=None,
+                downsample_method='lttb',
+                render='auto',
+                validate=True,
+                export_format='html',
+                compact=False,
+                show=None
+                ):
+    """
+    Plots the drawdown of every column of nav as an underwater chart,
+    the loss from the highest previous value, filled down from zero.
+    Returns the plotly figure.
+    :param nav: pandas dataframe or serie, or NavStats
+        net asset values with timeseries, each column represents a
+        fund. A NavStats of them reuses its drawdowns, see NavStats
+    :param title: str, default: 'Titulo'
+        title of the chart
+    :param suptitle: str, default: 'Subtitulo'
+        suptitle of the chat
+    :param ylabel: str, default: 'ylabel'
+        y label of the chat
+    :param xlabel: str, default: 'xlabel'
+        x label of the chat
+    :param imgname: str, default: 'fintualistic'
+        name of the html file
+    :param save: boolean, default: True
+        True if you want to save an html file
+    :param title_size: int, default: 35
+        Title font size
+    :param label_size: int, default: 22
+        Axis labels font size
+    :param showlegend: boolean, default: True
+        True if you want to show the legend
+    :param legend_size: int, default: 30
+        Legend font size
+    :param tick_size: int, default: 30
+        Ticks font size
+    :param max_points: int, default: None
+        maximum number of points per serie, longer series are
+        downsampled before plotting. If None, every point is plotted
+    :param downsample_method: str, default: 'lttb'
+        'lttb' for an approximate Largest Triangle Three Buckets
+        that keeps the global minimum and maximum,
+        'minmax' for the minimum and maximum of every bucket
+    :param render: str, default: 'auto'
+        'svg', 'webgl' or 'auto', 'auto' uses WebGL
+        when the chart has more than 50000 points
+    :param validate: boolean, default: True
+        False to build the figure as a plain dict without plotly's
+        validation of every trace, see plot_series
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
+    """
+
+    stats = _nav_stats(nav)
+    fig = _stats_chart(
+                    stats.drawdown(), 'tozeroy', '.0%',
+                    title, suptitle, ylabel, xlabel, title_size, label_size,
+                    showlegend, legend_size, tick_size, max_points,
+                    downsample_method, render, validate, compact)
+
+    return _output(
+                fig, imgname, save, show, export_format, compact)
+
+
+@_profiled
+@_cached
+def plot_rolling(
+                nav,
+                window=252,
+                statistic='return',
+                risk_free=0.0,
+                periods_per_year=None,
+                min_periods=None,
+                title='Titulo',
+                suptitle='Subtitulo',
+                ylabel='ylabel',
+                xlabel='xlabel',
+                imgname='fintualistic',
+                save=True,
+                title_size=35,
+                label_size=22,
+                showlegend=True,
+                legend_size=30,
+                tick_size=20,
+                max_points=None,
+                downsample_method='lttb',
+                render='auto',
+                validate=True,
+                export_format='html',
+                compact=False,
+                show=None
+                ):
+    """
+    Plots a rolling statistic of every column of nav as a line chart,
+    e.g. 12 month returns, volatility or sharpe ratio.
+    Returns the plotly figure.
+    :param nav: pandas dataframe or serie, or NavStats
+        net asset values with timeseries, each column represents a
+        fund. A NavStats of them reuses its returns and results,
+        so several charts of the same funds compute them once
+    :param window: int or str, default: 252
+        number of observations, or a pandas frequency such as '365D'
+        to roll over dates
+    :param statistic: str, default: 'return'
+        'return' over the window, annualized 'volatility' of the
+        returns or annualized 'sharpe' ratio
+    :param risk_free: float, default: 0.0
+        annual risk free rate subtracted by the sharpe ratio
+    :param periods_per_year: float, default: None
+        observations per year to annualize volatility and sharpe,
+        if None, it is inferred from the index. Ignored for a NavStats
+    :param min_periods: int, default: None
+        returns needed in a window for volatility and sharpe,
+        if None, every return of an int window and 2 otherwise
+    :param title: str, default: 'Titulo'
+        title of the chart
+    :param suptitle: str, default: 'Subtitulo'
+        suptitle of the chat
+    :param ylabel: str, default: 'ylabel'
+        y label of the chat
+    :param xlabel: str, default: 'xlabel'
+        x label of the chat
+    :param imgname: str, default: 'fintualistic'
+        name of the html file
+    :param save: boolean, default: True
+        True if you want to save an html file
+    :param title_size: int, default: 35
+        Title font size
+    :param label_size: int, default: 22
+        Axis labels font size
+    :param showlegend: boolean, default: True
+        True if you want to show the legend
+    :param legend_size: int, default: 30
+        Legend font size
+    :param tick_size: int, default: 30
+        Ticks font size
+    :param max_points: int, default: None
+        maximum number of points per serie, longer series are
+        downsampled before plotting. If None, every point is plotted
+    :param downsample_method: str, default: 'lttb'
+        'lttb' for an approximate Largest Triangle Three Buckets
+        that keeps the global minimum and maximum,
+        'minmax' for the minimum and maximum of every bucket
+    :param render: str, default: 'auto'
+        'svg', 'webgl' or 'auto', 'auto' uses WebGL
+        when the chart has more than 50000 points
+    :param validate: boolean, default: True
+        False to build the figure as a plain dict without plotly's
+        validation of every trace, see plot_series
+    :param export_format: str or tuple, default: 'html'
+        formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf',
+        images are exported with kaleido
+    :param compact: boolean or str, default: False
+        True to save the trace data of html and json files as base64
+        typed arrays and dates as milliseconds, 'float32' to also
+        store the values as float32
+    :param show: boolean, default: None
+        True if you want to display the chart with fig.show(),
+        if None, it is shown unless headless mode is on
+    """
+
+    stats = _nav_stats(nav, periods_per_year)
+    data = stats.rolling(window, statistic, risk_free, min_periods)
+    if statistic == 'sharpe':
+        tickformat = None
+    else:
+        tickformat = '.0%'
+    fig = _stats_chart(
+                    data, None, tickformat,
+                    title, suptitle, ylabel, xlabel, title_size, label_size,
+                    showlegend, legend_size, tick_size, max_points,
+                    downsample_method, render, validate, compact)
+
+    return _output(
+                fig, imgname, save, show, export_format, compact)
+
+
+def __getattr__(name):
+    # lazy re-export, see the note on imports at the top of the module
+    if name in _lazy_exports:
+        import importlib
+        module = importlib.import_module(_lazy_exports[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(
+                "module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,227 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+_formats = ('html', 'json', 'png', 'svg', 'pdf')
+
+# executor of the async plot functions, see set_async_workers
+_executor = None
+_workers = None
+_processes = True
+_max_pending = None
+_lock = threading.Lock()
+
+# slots of the charts in flight, one semaphore per event loop
+_slots = {}
+
+
+def set_async_workers(workers=None, processes=True, max_pending=None):
+    """
+    Configures the executor of the aplot_* functions. It is started on
+    the first call and replaced when this function is called again.
+    :param workers: int, default: None
+        number of workers, if None the number of cpus is used
+    :param processes: boolean, default: True
+        True to build the charts in a pool of processes, so they run in
+        parallel, False to use threads, which avoids pickling the data
+        but shares the GIL with the event loop
+    :param max_pending: int, default: None
+        charts in flight at once, queued or running, further calls wait
+        for a free slot. If None, twice the number of workers
+    """
+
+    global _executor, _workers, _processes, _max_pending
+
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+        _workers = workers
+        _processes = processes
+        _max_pending = max_pending
+        _slots.clear()
+
+
+def _get_executor():
+    """
+    Returns the executor, starting it if needed.
+    """
+
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            workers = _workers or os.cpu_count() or 1
+            if _processes:
+                _executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                _executor = ThreadPoolExecutor(max_workers=workers)
+        return _executor
+
+
+def _get_slots():
+    """
+    Returns the semaphore that bounds the charts in flight
+    on the running event loop.
+    """
+
+    loop = asyncio.get_running_loop()
+    with _lock:
+        if loop not in _slots:
+            workers = _workers or os.cpu_count() or 1
+            _slots.clear()
+            _slots[loop] = asyncio.Semaphore(_max_pending or 2 * workers)
+        return _slots[loop]
+
+
+def serialize(fig, format='html', compact=False, include_plotlyjs=True):
+    """
+    Returns a figure as bytes in one of the export formats
+    of the plot functions.
+    :param fig: plotly figure or dict
+        figure to serialize
+    :param format: str, default: 'html'
+        'html', 'json', 'png', 'svg' or 'pdf'
+    :param compact: boolean or str, default: False
+        True to encode the trace data of html and json as base64 typed
+        arrays, 'float32' to also store the values as float32
+    :param include_plotlyjs: boolean or str, default: True
+        how html includes plotly.js, see plotly.io.to_html,
+        'cdn' keeps the responses small
+    """
+
+    import plotly.io as pio
+
+    from .merging import post_script
+
+    if format not in _formats:
+        raise ValueError(
+                "export_format must be one of {}, got {!r}".format(
+                    _formats, format))
+
+    script = post_script(fig)
+    if format in ('html', 'json') and compact:
+        from .encoding import to_compact_dict
+
+        fig = to_compact_dict(fig, compact == 'float32')
+    if format == 'html':
+        text = pio.to_html(
+                    fig,
+                    include_plotlyjs=include_plotlyjs,
+                    validate=False,
+                    post_script=script)
+    elif format == 'json':
+        text = pio.to_json(fig, validate=False)
+    else:
+        from .export import get_engine
+
+        return get_engine().to_image(fig, format)
+    return text.encode('utf-8')
+
+
+def _render(function, args, kwargs, format, compact, include_plotlyjs):
+    """
+    Builds a chart in a worker and returns it serialized.
+    """
+
+    import fintualistic
+
+    plot = getattr(fintualistic, function)
+    fig = plot(*args, save=False, show=False, **kwargs)
+    return serialize(fig, format, compact, include_plotlyjs)
+
+
+def _write(path, content):
+    from .cache import detach
+
+    detach(path)
+    with open(path, 'wb') as f:
+        f.write(content)
+
+
+async def _aplot(function, args, kwargs):
+    """
+    Runs a plot function in the executor once there is a free slot.
+    """
+
+    format = kwargs.pop('export_format', 'html')
+    compact = kwargs.pop('compact', False)
+    include_plotlyjs = kwargs.pop('include_plotlyjs', True)
+    imgname = kwargs.pop('imgname', None)
+    timeout = kwargs.pop('timeout', None)
+    for name in ('save', 'show'):
+        if name in kwargs:
+            raise TypeError(
+                    'a{}() does not take {}, it returns the chart '
+                    'as bytes'.format(function, name))
+
+    slots = _get_slots()
+    if timeout is None:
+        await slots.acquire()
+    else:
+        await asyncio.wait_for(slots.acquire(), timeout)
+    try:
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(
+                            _get_executor(),
+                            _render,
+                            function,
+                            args,
+                            kwargs,
+                            format,
+                            compact,
+                            include_plotlyjs)
+    finally:
+        slots.release()
+
+    if imgname is not None:
+        await loop.run_in_executor(
+                            None, _write, imgname + '.' + format, content)
+    return content
+
+
+_doc = """
+    Async version of {function}, the chart is built in the executor
+    configured with set_async_workers and returned serialized, without
+    blocking the event loop. When max_pending charts are in flight the
+    call waits for a free slot.
+    Returns the chart as bytes.
+    Takes the arguments of {function} except save and show, plus:
+    :param export_format: str, default: 'html'
+        'html', 'json', 'png', 'svg' or 'pdf'
+    :param include_plotlyjs: boolean or str, default: True
+        how html includes plotly.js, see plotly.io.to_html
+    :param imgname: str, default: None
+        name of a file to also write the chart to, without extension,
+        it is written in a thread. If None, no file is written
+    :param timeout: float, default: None
+        seconds to wait for a free slot before raising
+        asyncio.TimeoutError. If None, it waits as long as needed
+    """
+
+
+def _async_version(function):
+    """
+    Returns the async version of a plot function.
+    """
+
+    async def aplot(*args, **kwargs):
+        return await _aplot(function, args, kwargs)
+
+    aplot.__name__ = aplot.__qualname__ = 'a' + function
+    aplot.__doc__ = _doc.format(function=function)
+    return aplot
+
+
+aplot_series = _async_version('plot_series')
+aplot_bar = _async_version('plot_bar')
+aplot_combo_series = _async_version('plot_combo_series')
+aplot_pie = _async_version('plot_pie')
+aplot_scatter = _async_version('plot_scatter')
+aplot_dist = _async_version('plot_dist')
+aplot_area = _async_version('plot_area')
+aplot_candlestick = _async_version('plot_candlestick')
+aplot_drawdown = _async_version('plot_drawdown')
+aplot_rolling = _async_version('plot_rolling')
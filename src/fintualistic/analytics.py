@@ -0,0 +1,224 @@
+import numpy as np
+import pandas as pd
+
+
+_statistics = ('return', 'volatility', 'sharpe')
+
+# used when the frequency of the data can not be inferred from its index
+_default_periods_per_year = 252
+
+
+def _periods_per_year(index):
+    """
+    Returns the number of observations per year of a DatetimeIndex,
+    from its first and last dates.
+    """
+
+    if isinstance(index, pd.DatetimeIndex) and len(index) > 1:
+        years = (index[-1] - index[0]) / pd.Timedelta(days=365.25)
+        if years > 0:
+            return (len(index) - 1) / years
+    return _default_periods_per_year
+
+
+def _window_starts(index, window):
+    """
+    Returns, for every row, the position of the row where its window
+    starts, negative if the window goes back before the first row.
+    :param index: pandas index
+        sorted index of the data
+    :param window: int or str
+        number of rows, or a pandas frequency such as '365D' or '52W'
+        for the last row at or before each date minus the frequency
+    """
+
+    if isinstance(window, (int, np.integer)):
+        if window < 1:
+            raise ValueError('window must be positive, got {}'.format(window))
+        return np.arange(len(index)) - window
+
+    if not isinstance(index, pd.DatetimeIndex):
+        raise ValueError(
+                    'a window of {!r} requires a DatetimeIndex, '
+                    'use a number of rows instead'.format(window))
+    if not index.is_monotonic_increasing:
+        raise ValueError('the index must be sorted to roll over dates')
+    bounds = index - pd.tseries.frequencies.to_offset(window)
+    return np.searchsorted(index.values, bounds.values, side='right') - 1
+
+
+def _prefix_sums(values):
+    """
+    Returns the prefix sums of values, their squares and their count,
+    missing values counted as zero, with a leading row of zeros so the
+    sum of rows (s, t] is sums[t + 1] - sums[s + 1].
+    """
+
+    valid = np.isfinite(values)
+    clean = np.where(valid, values, 0.0)
+    zeros = np.zeros((1, values.shape[1]))
+    return (
+        np.concatenate((zeros, np.cumsum(clean, axis=0))),
+        np.concatenate((zeros, np.cumsum(clean * clean, axis=0))),
+        np.concatenate((zeros, np.cumsum(valid, axis=0))))
+
+
+class NavStats:
+    """
+    Drawdowns and rolling statistics of NAV series, computed with
+    vectorized kernels over every column at once: a cumulative maximum
+    for drawdowns and prefix sums of the returns for rolling windows,
+    so each statistic costs O(n) whatever the window.
+    The returns, prefix sums and results are kept, so the same object
+    can feed several charts, e.g. plot_drawdown and plot_rolling.
+    :param nav: pandas dataframe or serie
+        net asset values, each column represents a fund
+    :param periods_per_year: float, default: None
+        observations per year to annualize volatility and sharpe,
+        if None, it is inferred from the dates of the index
+    """
+
+    def __init__(self, nav, periods_per_year=None):
+        if periods_per_year is None:
+            periods_per_year = _periods_per_year(nav.index)
+        self.nav = nav
+        self.periods_per_year = periods_per_year
+        self._values = nav.to_numpy(dtype='float64').reshape(len(nav), -1)
+        self._returns = None
+        self._sums = None
+        self._results = {}
+
+    def _wrap(self, values):
+        """
+        Returns values with the index and columns of the nav.
+        """
+
+        if isinstance(self.nav, pd.Series):
+            return pd.Series(values[:, 0], self.nav.index, name=self.nav.name)
+        return pd.DataFrame(values, self.nav.index, self.nav.columns)
+
+    def returns(self):
+        """
+        Returns the simple returns, as a numpy array with a row per
+        observation, the first one missing.
+        """
+
+        if self._returns is None:
+            values = self._values
+            returns = np.full(values.shape, np.nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns[1:] = values[1:] / values[:-1] - 1
+            self._returns = returns
+        return self._returns
+
+    def drawdown(self):
+        """
+        Returns the drawdown of every column, the loss from its highest
+        previous value, 0 at new highs and negative below them.
+        """
+
+        if 'drawdown' not in self._results:
+            peak = np.fmax.accumulate(self._values, axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = self._values / peak - 1
+            self._results['drawdown'] = self._wrap(result)
+        return self._results['drawdown']
+
+    def rolling(self, window, statistic='return', risk_free=0.0,
+                min_periods=None):
+        """
+        Returns a rolling statistic of every column, missing where
+        the window is incomplete.
+        :param window: int or str
+            number of observations, e.g. 252, or a pandas frequency,
+            e.g. '365D' or '52W', to roll over dates
+        :param statistic: str, default: 'return'
+            'return' over the window, annualized 'volatility' of the
+            returns or annualized 'sharpe' ratio
+        :param risk_free: float, default: 0.0
+            annual risk free rate subtracted by the sharpe ratio
+        :param min_periods: int, default: None
+            returns needed in a window for volatility and sharpe,
+            if None, every return of an int window and 2 otherwise
+        """
+
+        if statistic not in _statistics:
+            raise ValueError(
+                        "statistic must be one of {}, got {!r}".format(
+                            _statistics, statistic))
+
+        key = (window, statistic, risk_free, min_periods)
+        if key in self._results:
+            return self._results[key]
+
+        ends = np.arange(len(self._values))
+        starts = _window_starts(self.nav.index, window)
+        complete = starts >= 0
+        starts = np.maximum(starts, 0)
+
+        if statistic == 'return':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = self._values / self._values[starts] - 1
+        else:
+            if self._sums is None:
+                self._sums = _prefix_sums(self.returns())
+            sums, squares, counts = (
+                        prefix[ends + 1] - prefix[starts + 1]
+                        for prefix in self._sums)
+            if min_periods is None:
+                if isinstance(window, (int, np.integer)):
+                    min_periods = window
+                else:
+                    min_periods = 2
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = sums / counts
+                variance = np.maximum(
+                            (squares - sums * mean) / (counts - 1), 0)
+                std = np.sqrt(variance)
+                scale = np.sqrt(self.periods_per_year)
+                if statistic == 'volatility':
+                    result = std * scale
+                else:
+                    excess = mean - risk_free / self.periods_per_year
+                    result = excess / std * scale
+            complete = complete[:, None] & (counts >= max(min_periods, 2))
+
+        result = np.where(
+                    complete.reshape(len(result), -1) & np.isfinite(result),
+                    result,
+                    np.nan)
+        self._results[key] = self._wrap(result)
+        return self._results[key]
+
+
+def drawdown(nav):
+    """
+    Returns the drawdown of every column of nav, see NavStats.drawdown.
+    :param nav: pandas dataframe or serie
+        net asset values, each column represents a fund
+    """
+
+    return NavStats(nav).drawdown()
+
+
+def rolling(nav, window, statistic='return', risk_free=0.0,
+            periods_per_year=None, min_periods=None):
+    """
+    Returns a rolling statistic of every column of nav,
+    see NavStats.rolling.
+    :param nav: pandas dataframe or serie
+        net asset values, each column represents a fund
+    :param window: int or str
+        number of observations, or a pandas frequency such as '365D'
+    :param statistic: str, default: 'return'
+        'return', 'volatility' or 'sharpe'
+    :param risk_free: float, default: 0.0
+        annual risk free rate subtracted by the sharpe ratio
+    :param periods_per_year: float, default: None
+        observations per year, if None, inferred from the index
+    :param min_periods: int, default: None
+        returns needed in a window for volatility and sharpe
+    """
+
+    stats = NavStats(nav, periods_per_year)
+    return stats.rolling(window, statistic, risk_free, min_periods)
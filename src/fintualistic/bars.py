@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+
+_si_prefixes = {
+            -24: 'y', -21: 'z', -18: 'a', -15: 'f', -12: 'p', -9: 'n',
+            -6: 'µ', -3: 'm', 0: '', 3: 'k', 6: 'M', 9: 'G', 12: 'T',
+            15: 'P', 18: 'E', 21: 'Z', 24: 'Y'}
+
+
+def _decimals(scaled, digits):
+    """
+    Returns the decimals that give digits significant figures.
+    """
+
+    decimals = digits - 1 - np.floor(
+                            np.log10(np.maximum(np.abs(scaled), 1)))
+    return np.maximum(decimals, 0).astype('int64')
+
+
+def si_labels(values, digits=3):
+    """
+    Formats numbers with digits significant figures and an SI prefix,
+    as the d3 format '.3s' does, e.g. 1234 as '1.23k'.
+    Returns a numpy array of str, missing values are empty strings.
+    :param values: array
+        numbers to format
+    :param digits: int, default: 3
+        significant figures
+    """
+
+    values = np.asarray(values, dtype='float64')
+    labels = np.full(values.shape, '', dtype=object)
+    valid = np.isfinite(values)
+    if not valid.any():
+        return labels
+
+    x = values[valid]
+    magnitude = np.abs(x)
+    exponent = np.floor(np.log10(np.where(magnitude > 0, magnitude, 1)))
+    exponent = np.clip(exponent // 3 * 3, -24, 24).astype('int64')
+    scaled = x / 10.0 ** exponent
+
+    # rounding can add a digit, e.g. 99.96 to 100.0 or 999.9 to 1.00k
+    decimals = _decimals(scaled, digits)
+    scaled = np.round(scaled * 10.0 ** decimals) / 10.0 ** decimals
+    decimals = _decimals(scaled, digits)
+    carry = (np.abs(scaled) >= 1000) & (exponent < 24)
+    exponent[carry] += 3
+    scaled[carry] /= 1000
+    decimals[carry] = digits - 1
+
+    text = np.empty(len(x), dtype=object)
+    for d in np.unique(decimals):
+        selected = decimals == d
+        text[selected] = np.char.mod('%.{}f'.format(d), scaled[selected])
+    prefixes = np.array([_si_prefixes[e] for e in range(-24, 27, 3)])
+    text = np.char.add(
+                text.astype(str), prefixes[(exponent + 24) // 3])
+    labels[valid] = text
+    return labels
+
+
+def top_categories(data, top, others='Others'):
+    """
+    Keeps the top categories (rows) of a dataframe by their total
+    absolute value and sums the rest in a last row.
+    :param data: pandas dataframe
+        dataframe with one row per category
+    :param top: int
+        number of categories to keep
+    :param others: str, default: 'Others'
+        name of the row with the sum of the other categories
+    """
+
+    if len(data) <= top:
+        return data
+
+    values = data.to_numpy(dtype='float64')
+    totals = np.nansum(np.abs(values), axis=1)
+    order = np.argsort(-totals, kind='stable')
+    kept = np.sort(order[:top])
+    rest = np.nansum(values[order[top:]], axis=0)
+
+    index = data.index[kept].astype(object).append(pd.Index([others]))
+    result = pd.DataFrame(
+                    np.vstack((values[kept], rest)),
+                    index=index,
+                    columns=data.columns)
+    result.index.name = data.index.name
+    return result
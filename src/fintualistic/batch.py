@@ -0,0 +1,79 @@
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _render_job(function, data, kwargs, imgname):
+    """
+    Builds and saves one chart, errors are returned instead of raised
+    so a failing job does not stop the rest of the batch.
+    Returns a dict with the job timing and error.
+    """
+
+    import fintualistic
+
+    start = time.perf_counter()
+    error = None
+    try:
+        if not isinstance(data, tuple):
+            data = (data,)
+        plot = getattr(fintualistic, function)
+        plot(*data, imgname=imgname, save=True, show=False, **kwargs)
+    except Exception:
+        error = traceback.format_exc()
+
+    return {
+            'function': function,
+            'imgname': imgname,
+            'seconds': time.perf_counter() - start,
+            'error': error}
+
+
+def _check_job(job):
+    """
+    Validates a chart spec and returns it as a tuple
+    (function, data, kwargs, imgname).
+    """
+
+    function = job['function']
+    if not function.startswith('plot_'):
+        raise ValueError(
+                    "function must be the name of a plot_* function, "
+                    "got {!r}".format(function))
+    return function, job['data'], job.get('kwargs', {}), job['imgname']
+
+
+def render_many(jobs, workers=None):
+    """
+    Builds and saves many charts across a pool of processes.
+    DataFrames are pickled to the workers, which sends their numpy
+    buffers as binary data. A failing chart does not stop the others,
+    its traceback is reported in the summary.
+    Returns a dict with the results of every job in order,
+    the failed jobs and the total time in seconds.
+    :param jobs: list of dict
+        chart specs with keys 'function' (e.g. 'plot_series'),
+        'data' (dataframe, serie or tuple of positional arguments),
+        'imgname' (name of the html file) and optionally 'kwargs'
+    :param workers: int, default: None
+        number of processes, if None the number of cpus is used,
+        1 renders every chart in the current process
+    """
+
+    specs = [_check_job(job) for job in jobs]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_render_job(*spec) for spec in specs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_render_job, *spec) for spec in specs]
+            results = [future.result() for future in futures]
+
+    return {
+            'results': results,
+            'failures': [r for r in results if r['error'] is not None],
+            'seconds': time.perf_counter() - start}
@@ -0,0 +1,287 @@
+import collections.abc
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .analytics import NavStats
+
+
+# temporary files older than this are left by crashed writers
+_stale_seconds = 3600
+
+# figure returned by the plot function on a hit
+_figure_format = 'figure.json'
+
+# array items hashed at a time
+_hash_items = 1000000
+
+
+def _update(digest, value):
+    """
+    Feeds a value to the hash, pandas and numpy objects are hashed
+    by their values, index, names and dtypes.
+    """
+
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        digest.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+            digest.update(repr(list(value.dtypes)).encode())
+        else:
+            digest.update(repr((value.name, value.dtype)).encode())
+        if not isinstance(value, pd.Index):
+            digest.update(repr(value.index.names).encode())
+            digest.update(repr(value.index.dtype).encode())
+        hashes = pd.util.hash_pandas_object(value, index=True)
+        digest.update(hashes.values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype, value.shape)).encode())
+        # in slices, so memory mapped arrays are not loaded at once
+        flat = value.reshape(-1) if value.flags.c_contiguous else value.ravel()
+        for start in range(0, flat.size, _hash_items):
+            digest.update(flat[start:start + _hash_items].tobytes())
+    elif isinstance(value, NavStats):
+        _update(digest, (value.nav, value.periods_per_year))
+    elif isinstance(value, (list, tuple)):
+        digest.update(type(value).__name__.encode())
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, dict):
+        digest.update(b'dict')
+        for key in sorted(value, key=repr):
+            _update(digest, key)
+            _update(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+    digest.update(b'|')
+
+
+def detach(path):
+    """
+    Removes path if it is a hard link to a cached file, so writing it
+    creates a new file instead of overwriting the cached one.
+    :param path: str
+        path of an output file
+    """
+
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def source_key(source):
+    """
+    Returns the value that identifies the data of a chart in the hash,
+    parquet paths by their path, size and modification time, so the
+    chart is built again when the file is rewritten. Returns None for
+    iterators, which are consumed once and can not be cached.
+    :param source:
+        data argument of a plot function
+    """
+
+    if isinstance(source, str) or hasattr(source, '__fspath__'):
+        path = os.path.abspath(os.fspath(source))
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return ('file', path, stat.st_size, stat.st_mtime_ns)
+    if isinstance(source, collections.abc.Iterator):
+        return None
+    return source
+
+
+def hash_inputs(name, arguments):
+    """
+    Returns a hex digest that identifies a chart,
+    from the plot function name and its arguments.
+    :param name: str
+        name of the plot function
+    :param arguments: dict
+        arguments of the plot function
+    """
+
+    digest = hashlib.blake2b(digest_size=20)
+    _update(digest, name)
+    _update(digest, arguments)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    On disk cache of saved charts, keyed by a hash of the data and the
+    arguments of the plot function. Files are written atomically and
+    the least recently used ones are evicted when the cache grows over
+    max_bytes, so several processes can share the same directory.
+    hits and misses count the lookups of this process.
+    :param directory: str
+        directory of the cache, it is created if needed
+    :param max_bytes: int, default: 1e9
+        maximum size of the cache in bytes
+    :param link: boolean, default: False
+        True to hard link cached files instead of copying them
+    """
+
+    def __init__(self, directory, max_bytes=int(1e9), link=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, format):
+        return os.path.join(self.directory, '{}.{}'.format(key, format))
+
+    def _place(self, source, target):
+        """
+        Copies or links source to target, replacing target.
+        """
+
+        if self.link:
+            try:
+                if os.path.lexists(target):
+                    os.remove(target)
+                os.link(source, target)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(source, target)
+
+    def fetch(self, key, formats, imgname):
+        """
+        Writes the cached files of a chart as imgname + '.' + format.
+        Returns the figure dict of the chart on a hit,
+        None if any format is missing.
+        :param key: str
+            hash of the chart, see hash_inputs
+        :param formats: tuple of str
+            formats of the chart
+        :param imgname: str
+            name of the output files, without extension
+        """
+
+        try:
+            path = self._path(key, _figure_format)
+            with open(path, encoding='utf-8') as f:
+                fig = json.load(f)
+            os.utime(path)
+            for format in formats:
+                path = self._path(key, format)
+                self._place(path, imgname + '.' + format)
+                # the modification time orders the eviction
+                os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            if self.link:
+                self._detach(formats, imgname)
+            return None
+        self.hits += 1
+        return fig
+
+    def _detach(self, formats, imgname):
+        """
+        Removes output files that are hard links, so rebuilding
+        them does not overwrite the cached files they point to.
+        """
+
+        for format in formats:
+            detach(imgname + '.' + format)
+
+    def store(self, key, formats, imgname, fig):
+        """
+        Adds the files imgname + '.' + format of a chart and its figure
+        to the cache and evicts the least recently used files if needed.
+        :param key: str
+            hash of the chart, see hash_inputs
+        :param formats: tuple of str
+            formats of the chart
+        :param imgname: str
+            name of the output files, without extension
+        :param fig: plotly figure or dict
+            figure returned by the plot function
+        """
+
+        import plotly.io as pio
+
+        for format in formats:
+            path = self._path(key, format)
+            temporary = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+            shutil.copyfile(imgname + '.' + format, temporary)
+            os.replace(temporary, path)
+        # stored last, so a hit always finds the files of every format
+        path = self._path(key, _figure_format)
+        temporary = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(pio.to_json(fig, validate=False))
+        os.replace(temporary, path)
+        self.evict()
+
+    def _entries(self):
+        """
+        Returns (modification time, size, path) of every cached file,
+        removing stale temporary files.
+        """
+
+        entries = []
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.endswith('.tmp'):
+                if now - stat.st_mtime > _stale_seconds:
+                    self._remove(entry.path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """
+        Removes the least recently used files until the cache
+        is smaller than max_bytes.
+        """
+
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, path in entries:
+            if size <= self.max_bytes:
+                break
+            self._remove(path)
+            size -= file_size
+
+    def stats(self):
+        """
+        Returns a dict with the hits and misses of this process
+        and the number of files and bytes in the cache.
+        """
+
+        entries = self._entries()
+        return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'files': len(entries),
+                'bytes': sum(entry[1] for entry in entries)}
+
+    def clear(self):
+        """
+        Removes every file of the cache.
+        """
+
+        for _, _, path in self._entries():
+            self._remove(path)
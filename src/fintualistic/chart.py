@@ -0,0 +1,360 @@
+import inspect
+
+import fintualistic
+
+from .spec import _coerce
+
+
+_functions = (
+            'plot_series',
+            'plot_bar',
+            'plot_combo_series',
+            'plot_pie',
+            'plot_scatter',
+            'plot_dist',
+            'plot_area',
+            'plot_candlestick',
+            'plot_drawdown',
+            'plot_rolling')
+
+# plot functions that can build the figure as a dict
+_dict_functions = (
+            'plot_series',
+            'plot_bar',
+            'plot_area',
+            'plot_drawdown',
+            'plot_rolling')
+
+# options of the plot functions that can change on every bind
+_labels = ('title', 'suptitle', 'xlabel', 'ylabel', 'ylabel1', 'ylabel2')
+
+# options that the chart sets itself
+_reserved = ('save', 'show', 'imgname', 'export_format')
+
+_header = '<b>{}</b> <br><sup>{}</sup>'
+
+
+def _arguments(function, options):
+    """
+    Returns the arguments of a figure helper of the plot functions,
+    taken from options or from the defaults of the plot function.
+    """
+
+    defaults = {
+        name: parameter.default
+        for name, parameter in inspect.signature(
+                getattr(fintualistic, function)).parameters.items()}
+    defaults.update(options)
+    helper = {
+        'plot_series': fintualistic._series_figure,
+        'plot_combo_series': fintualistic._combo_figure}[function]
+    names = list(inspect.signature(helper).parameters)[2:]
+    return {name: defaults[name] for name in names}
+
+
+def _with_text(layout, axis, text):
+    """
+    Returns a copy of layout with the title text of axis replaced,
+    copying only the dicts on the way.
+    """
+
+    if axis is None:
+        return dict(layout, title=dict(layout['title'], text=text))
+    properties = layout[axis]
+    title = dict(properties['title'], text=text)
+    return dict(layout, **{axis: dict(properties, title=title)})
+
+
+class Chart:
+    """
+    A chart whose layout and traces are built once and filled with new
+    data on every bind, for rendering the same chart for many datasets:
+
+        chart = Chart.combo_series(xlabel='Fecha', max_points=2000)
+        for fund, serie, benchmark in funds:
+            html = chart.bind(serie, benchmark, title=fund).to_html()
+
+    plot_series and plot_combo_series charts only replace the x and y
+    arrays, the names and the titles of the prebuilt figure, so they
+    are neither validated nor laid out again. The figure is rebuilt when
+    the data changes its shape, e.g. the number of columns, or for the
+    other plot functions.
+    :param function: str
+        name of the plot function, e.g. 'plot_series'
+    :param options:
+        arguments of the plot function except the data,
+        save, show, imgname and export_format
+    """
+
+    def __init__(self, function, **options):
+        if function not in _functions:
+            raise ValueError(
+                    "function must be one of {}, got {!r}".format(
+                        _functions, function))
+        for name in _reserved:
+            if name in options:
+                raise TypeError(
+                        'Chart does not take {}, it is given when the '
+                        'chart is written'.format(name))
+        self.function = function
+        self.options = options
+        self._key = None
+        self._skeleton = None
+        self._fig = None
+
+    @classmethod
+    def series(cls, **options):
+        return cls('plot_series', **options)
+
+    @classmethod
+    def bar(cls, **options):
+        return cls('plot_bar', **options)
+
+    @classmethod
+    def combo_series(cls, **options):
+        return cls('plot_combo_series', **options)
+
+    @classmethod
+    def pie(cls, **options):
+        return cls('plot_pie', **options)
+
+    @classmethod
+    def scatter(cls, **options):
+        return cls('plot_scatter', **options)
+
+    @classmethod
+    def dist(cls, **options):
+        return cls('plot_dist', **options)
+
+    @classmethod
+    def area(cls, **options):
+        return cls('plot_area', **options)
+
+    @classmethod
+    def candlestick(cls, **options):
+        return cls('plot_candlestick', **options)
+
+    @classmethod
+    def drawdown(cls, **options):
+        return cls('plot_drawdown', **options)
+
+    @classmethod
+    def rolling(cls, **options):
+        return cls('plot_rolling', **options)
+
+    def _build(self, data, options):
+        """
+        Builds the figure with the plot function, as a dict.
+        """
+
+        plot = getattr(fintualistic, self.function)
+        if self.function in _dict_functions:
+            options = dict(options, validate=False)
+        fig = plot(*data, save=False, show=False, **options)
+        if not isinstance(fig, dict):
+            fig = fig.to_dict()
+        return fig
+
+    def _series(self, data, options):
+        """
+        Returns the key of the skeleton, the traces and the builder of
+        the figure of plot_series. The data is prepared once, iterators
+        of chunks can only be read once.
+        """
+
+        import pandas as pd
+
+        columns, is_series = fintualistic._series_columns(
+                        data[0],
+                        options.get('max_points'),
+                        options.get('downsample_method', 'lttb'),
+                        options.get('freq'),
+                        options.get('resample_method', 'last'))
+
+        def build():
+            arguments = _arguments('plot_series', options)
+            arguments['validate'] = False
+            fig, _ = fintualistic._series_figure(
+                                        columns, is_series, **arguments)
+            return fig
+
+        if options.get('merge_traces'):
+            return None, None, build
+
+        webgl = fintualistic._use_webgl(
+                        options.get('render', 'auto'),
+                        sum(len(serie) for serie in columns))
+        dates = bool(columns) and isinstance(
+                                    columns[0].index, pd.DatetimeIndex)
+        key = (
+            len(columns),
+            webgl,
+            is_series,
+            dates,
+            tuple(serie.name is None for serie in columns))
+
+        compact = options.get('compact', False)
+        traces = []
+        for serie in columns:
+            props = {
+                'x': _coerce(fintualistic._x_values(serie.index, compact)),
+                'y': _coerce(serie)}
+            if serie.name is not None:
+                props['name'] = str(serie.name)
+            traces.append(props)
+        return key, traces, build
+
+    def _combo_series(self, data, options):
+        """
+        Returns the key of the skeleton, the traces, the y labels and
+        the builder of the figure of plot_combo_series.
+        """
+
+        serie_1, serie_2 = fintualistic._combo_columns(
+                        data[0],
+                        data[1],
+                        options.get('max_points'),
+                        options.get('downsample_method', 'lttb'),
+                        options.get('freq'),
+                        options.get('resample_method', 'last'))
+        labels = {}
+        for axis, option, serie in (('yaxis', 'ylabel1', data[0]),
+                                    ('yaxis2', 'ylabel2', data[1])):
+            label = options.get(option)
+            labels[axis] = serie.name if label is None else label
+        key = tuple(label is None for label in labels.values())
+        traces = [
+            {'x': _coerce(serie.index), 'y': _coerce(serie)}
+            for serie in (serie_1, serie_2)]
+
+        def build():
+            return fintualistic._combo_figure(
+                            serie_1,
+                            serie_2,
+                            **_arguments('plot_combo_series', options)
+                            ).to_dict()
+
+        return key, traces, labels, build
+
+    def bind(self, *data, **labels):
+        """
+        Fills the chart with new data.
+        Returns the chart, e.g. to call to_html.
+        :param data:
+            data arguments of the plot function, e.g. the dataframe
+            of plot_series or both series of plot_combo_series
+        :param labels:
+            title, suptitle, xlabel, ylabel, ylabel1 or ylabel2 for
+            this data only, the other options are fixed by the chart
+        """
+
+        for name in labels:
+            if name not in _labels:
+                raise TypeError(
+                        'bind only takes {} options, got {!r}'.format(
+                            _labels, name))
+        options = dict(self.options, **labels)
+
+        key = traces = None
+        axes = {}
+        if self.function == 'plot_series':
+            key, traces, build = self._series(data, options)
+            axes = {'xaxis': options.get('xlabel', 'xlabel'),
+                    'yaxis': options.get('ylabel', 'ylabel')}
+        elif self.function == 'plot_combo_series':
+            key, traces, axes, build = self._combo_series(data, options)
+            axes['xaxis'] = options.get('xlabel', 'xlabel')
+        else:
+            def build():
+                return self._build(data, options)
+
+        if key is None:
+            self._key = self._skeleton = None
+            self._fig = build()
+            return self
+        # labels set to None have no text in the skeleton
+        key += tuple(text is None for text in axes.values())
+        if key != self._key:
+            self._skeleton = build()
+            self._key = key
+            self._fig = self._skeleton
+            return self
+
+        layout = _with_text(
+                    self._skeleton['layout'],
+                    None,
+                    _header.format(
+                        options.get('title', 'Titulo'),
+                        options.get('suptitle', 'Subtitulo')))
+        for axis, text in axes.items():
+            if text is not None:
+                layout = _with_text(layout, axis, text)
+        self._fig = {
+            'data': [dict(skeleton, **props)
+                     for skeleton, props in zip(self._skeleton['data'],
+                                                traces)],
+            'layout': layout}
+        return self
+
+    def figure(self):
+        """
+        Returns the figure of the last bind, as a dict.
+        """
+
+        if self._fig is None:
+            raise ValueError('the chart has no data, call bind first')
+        return self._fig
+
+    def to_bytes(self, format='html', include_plotlyjs=True):
+        """
+        Returns the chart serialized, see aio.serialize.
+        :param format: str, default: 'html'
+            'html', 'json', 'png', 'svg' or 'pdf'
+        :param include_plotlyjs: boolean or str, default: True
+            how html includes plotly.js, see plotly.io.to_html
+        """
+
+        from .aio import serialize
+
+        return serialize(
+                    self.figure(),
+                    format,
+                    self.options.get('compact', False),
+                    include_plotlyjs)
+
+    def to_html(self, include_plotlyjs=True):
+        """
+        Returns the chart as an html document.
+        :param include_plotlyjs: boolean or str, default: True
+            how html includes plotly.js, see plotly.io.to_html
+        """
+
+        return self.to_bytes('html', include_plotlyjs).decode('utf-8')
+
+    def to_json(self):
+        """
+        Returns the chart as a plotly json string.
+        """
+
+        return self.to_bytes('json').decode('utf-8')
+
+    def write(self, imgname='fintualistic', export_format='html'):
+        """
+        Saves the chart as the plot functions do.
+        :param imgname: str, default: 'fintualistic'
+            name of the file, without extension
+        :param export_format: str or tuple, default: 'html'
+            formats to save, any of 'html', 'json', 'png', 'svg' and 'pdf'
+        """
+
+        from .merging import post_script
+
+        fig = self.figure()
+        fintualistic._output(
+                    fig,
+                    imgname,
+                    True,
+                    False,
+                    export_format,
+                    self.options.get('compact', False),
+                    post_script(fig))
@@ -0,0 +1,402 @@
+"""
+Renders the charts of a manifest, only the ones whose inputs or
+settings changed since the last run.
+
+    fintualistic charts.json
+    fintualistic charts.json --watch
+
+The manifest is a json file with a list of charts:
+
+    {"charts": [
+        {"name": "funds",
+         "function": "plot_series",
+         "input": "data/funds.csv",
+         "columns": ["risky norris", "moderate pitt"],
+         "kwargs": {"title": "Funds", "max_points": 2000},
+         "output": "out/funds",
+         "export_format": "html"}]}
+
+input is a csv (first column as index, dates parsed) or parquet file,
+or a list of them joined by columns. plot_combo_series and plot_scatter
+get the first two columns, plot_pie and plot_candlestick with a single
+column get a serie. Paths are relative to the manifest.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import sys
+import time
+import traceback
+
+
+_logger = logging.getLogger(__name__)
+
+# functions that take two series instead of a dataframe
+_pairs = ('plot_combo_series', 'plot_scatter')
+
+# functions that take a serie when the input has a single column
+_single = ('plot_pie', 'plot_candlestick')
+
+_state_name = '.fintualistic-state.json'
+
+
+def _file_digest(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Project:
+    """
+    Charts of a manifest with the fingerprints of their inputs and
+    settings, stored next to the manifest between runs.
+    Input files are only hashed again when their size or modification
+    time change, and are only read again when their hash changes.
+    :param manifest: str
+        path of the json manifest
+    """
+
+    def __init__(self, manifest):
+        self.manifest = os.path.abspath(manifest)
+        self.root = os.path.dirname(self.manifest)
+        self.state_path = os.path.join(self.root, _state_name)
+        self.charts = {}
+        self._files = {}
+        self._frames = {}
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+        self.load()
+
+    def _path(self, path):
+        return os.path.join(self.root, os.path.expanduser(path))
+
+    def load(self):
+        """
+        Reads the manifest.
+        """
+
+        with open(self.manifest) as f:
+            manifest = json.load(f)
+
+        charts = {}
+        for chart in manifest['charts']:
+            name = chart.get('name', chart['output'])
+            if not chart['function'].startswith('plot_'):
+                raise ValueError(
+                        "function must be the name of a plot_* function, "
+                        "got {!r}".format(chart['function']))
+            inputs = chart['input']
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            charts[name] = dict(chart, input=[self._path(p) for p in inputs])
+        self.charts = charts
+
+    def inputs(self):
+        """
+        Returns the set of input files of every chart.
+        """
+
+        return {path for chart in self.charts.values()
+                for path in chart['input']}
+
+    def _file_fingerprint(self, path):
+        """
+        Returns the hash of an input file, hashing it only if its
+        size or modification time changed.
+        """
+
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        known = self._files.get(path)
+        if known is None or known[0] != key:
+            known = (key, _file_digest(path))
+            self._files[path] = known
+        return known[1]
+
+    def fingerprint(self, name):
+        """
+        Returns the hash of the settings and the inputs of a chart.
+        """
+
+        chart = self.charts[name]
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps(chart, sort_keys=True).encode('utf-8'))
+        for path in chart['input']:
+            digest.update(self._file_fingerprint(path).encode('ascii'))
+        return digest.hexdigest()
+
+    def _outputs(self, chart):
+        formats = chart.get('export_format', 'html')
+        if isinstance(formats, str):
+            formats = (formats,)
+        output = self._path(chart['output'])
+        return [output + '.' + format for format in formats]
+
+    def stale(self, force=False):
+        """
+        Returns the names of the charts that have to be rendered,
+        because their inputs or settings changed or an output is missing.
+        """
+
+        names = []
+        for name, chart in self.charts.items():
+            try:
+                fingerprint = self.fingerprint(name)
+            except FileNotFoundError:
+                # reported as a failure by render
+                names.append(name)
+                continue
+            outputs = self._outputs(chart)
+            if (force or
+                    self.state.get(name) != fingerprint or
+                    not all(os.path.exists(path) for path in outputs)):
+                names.append(name)
+        return names
+
+    def _read(self, path):
+        """
+        Reads an input file, reusing the dataframe while its hash
+        does not change.
+        """
+
+        import pandas as pd
+
+        fingerprint = self._file_fingerprint(path)
+        cached = self._frames.get(path)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        if path.endswith(('.parquet', '.pq')):
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path, index_col=0, parse_dates=True)
+        self._frames[path] = (fingerprint, frame)
+        return frame
+
+    def _arguments(self, chart):
+        """
+        Returns the positional arguments of the plot function of a chart.
+        """
+
+        import pandas as pd
+
+        frames = [self._read(path) for path in chart['input']]
+        if len(frames) == 1:
+            data = frames[0]
+        else:
+            data = pd.concat(frames, axis=1)
+        if 'columns' in chart:
+            data = data[chart['columns']]
+        if chart['function'] in _pairs:
+            return data.iloc[:, 0], data.iloc[:, 1]
+        if chart['function'] in _single and data.shape[1] == 1:
+            return (data.iloc[:, 0],)
+        return (data,)
+
+    def render(self, name):
+        """
+        Renders a chart and records its fingerprint.
+        Returns True if it was rendered, False if it failed.
+        """
+
+        import fintualistic
+
+        chart = self.charts[name]
+        start = time.perf_counter()
+        try:
+            fingerprint = self.fingerprint(name)
+            plot = getattr(fintualistic, chart['function'])
+            output = self._path(chart['output'])
+            directory = os.path.dirname(output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            plot(
+                *self._arguments(chart),
+                imgname=output,
+                save=True,
+                show=False,
+                export_format=chart.get('export_format', 'html'),
+                **chart.get('kwargs', {}))
+        except FileNotFoundError as error:
+            _logger.error('%s failed, missing %s', name, error.filename)
+            self.state.pop(name, None)
+            return False
+        except Exception:
+            _logger.error('%s failed\n%s', name, traceback.format_exc())
+            self.state.pop(name, None)
+            return False
+
+        self.state[name] = fingerprint
+        _logger.info(
+                    'Rendered %s in %.3f seconds',
+                    name, time.perf_counter() - start)
+        return True
+
+    def build(self, force=False):
+        """
+        Renders the stale charts and saves the state.
+        Returns the number of charts that failed.
+        """
+
+        failed = 0
+        for name in self.stale(force):
+            failed += not self.render(name)
+        for name in set(self.state) - set(self.charts):
+            del self.state[name]
+        self.save()
+        return failed
+
+    def save(self):
+        temporary = self.state_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.state_path)
+
+
+def _poll(paths, interval, changes):
+    """
+    Puts in changes the paths whose size or modification time
+    changed, checking them every interval seconds.
+    """
+
+    def stat(path):
+        try:
+            result = os.stat(path)
+            return result.st_size, result.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    known = {path: stat(path) for path in paths()}
+    while True:
+        time.sleep(interval)
+        for path in paths():
+            current = stat(path)
+            if known.get(path) != current:
+                known[path] = current
+                changes.put(path)
+
+
+def _observe(paths, changes):
+    """
+    Watches the directories of paths with watchdog, if installed.
+    Returns the observer or None.
+    """
+
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class Handler(FileSystemEventHandler):
+
+        def on_any_event(self, event):
+            for path in (event.src_path, getattr(event, 'dest_path', '')):
+                if path:
+                    changes.put(os.path.abspath(path))
+
+    observer = Observer()
+    for directory in {os.path.dirname(path) for path in paths()}:
+        if os.path.isdir(directory):
+            observer.schedule(Handler(), directory, recursive=False)
+    observer.start()
+    return observer
+
+
+def watch(project, interval=0.2, debounce=0.05):
+    """
+    Renders the charts again when their inputs or the manifest change,
+    until interrupted. Uses watchdog if it is installed, else polls the
+    files every interval seconds.
+    :param project: Project
+        charts to watch
+    :param interval: float, default: 0.2
+        seconds between checks when polling
+    :param debounce: float, default: 0.05
+        seconds to wait for more changes before rendering
+    """
+
+    import threading
+
+    changes = queue.Queue()
+
+    def paths():
+        return project.inputs() | {project.manifest}
+
+    observer = _observe(paths, changes)
+    if observer is None:
+        thread = threading.Thread(
+                        target=_poll,
+                        args=(paths, interval, changes),
+                        daemon=True)
+        thread.start()
+
+    _logger.info('Watching %s input files', len(project.inputs()))
+    try:
+        while True:
+            changed = {changes.get()}
+            time.sleep(debounce)
+            while not changes.empty():
+                changed.add(changes.get())
+            if not changed & paths():
+                continue
+            if project.manifest in changed:
+                try:
+                    project.load()
+                except (ValueError, KeyError) as error:
+                    _logger.error('Invalid manifest: %s', error)
+                    continue
+            project.build()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+                prog='fintualistic',
+                description=__doc__.split('\n\n')[0].strip(),
+                epilog=__doc__.split('\n\n', 2)[2],
+                formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+                'manifest',
+                help='json file with the charts')
+    parser.add_argument(
+                '--watch', action='store_true',
+                help='render the charts again when their inputs change')
+    parser.add_argument(
+                '--force', action='store_true',
+                help='render every chart, changed or not')
+    parser.add_argument(
+                '--interval', type=float, default=0.2,
+                help='seconds between checks when polling the files')
+    parser.add_argument(
+                '--quiet', action='store_true',
+                help='only report errors')
+    options = parser.parse_args(argv)
+
+    logging.basicConfig(
+                level=logging.ERROR if options.quiet else logging.INFO,
+                format='%(asctime)s %(message)s')
+
+    import fintualistic
+
+    fintualistic.set_headless()
+    project = Project(options.manifest)
+    failed = project.build(options.force)
+    if options.watch:
+        watch(project, options.interval)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
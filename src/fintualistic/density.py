@@ -0,0 +1,136 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def histogram(values, bin_size):
+    """
+    Probability density histogram with fixed width bins,
+    starting at the minimum of the values.
+    Returns the bin centers and the density of every bin.
+    :param values: numpy array
+        samples, without nans
+    :param bin_size: float
+        width of the bins
+    """
+
+    low = values.min()
+    high = values.max()
+    if not bin_size > 0 or high == low:
+        return np.array([low]), np.array([1.0])
+
+    n_bins = int(np.floor((high - low) / bin_size)) + 1
+    positions = ((values - low) / bin_size).astype('int64')
+    np.minimum(positions, n_bins - 1, out=positions)
+    counts = np.bincount(positions, minlength=n_bins)
+    centers = low + (np.arange(n_bins) + 0.5) * bin_size
+    return centers, counts / (len(values) * bin_size)
+
+
+def kde(values, grid_size=512):
+    """
+    Gaussian kernel density estimate on a fixed grid.
+    The samples are linearly binned on the grid and convolved with
+    the kernel through an FFT, so the cost depends on the grid size
+    instead of the number of samples. The bandwidth follows Scott's
+    rule, as scipy.stats.gaussian_kde.
+    Returns the grid and the density at every grid point,
+    or None if the samples have no dispersion.
+    :param values: numpy array
+        samples, without nans
+    :param grid_size: int, default: 512
+        number of points of the grid
+    """
+
+    n = len(values)
+    if n < 2:
+        return None
+    bandwidth = values.std(ddof=1) * n ** (-1 / 5)
+    if not bandwidth > 0:
+        return None
+
+    low = values.min() - 3 * bandwidth
+    high = values.max() + 3 * bandwidth
+    grid = np.linspace(low, high, grid_size)
+    delta = grid[1] - grid[0]
+
+    # linear binning, every sample is split between its two grid points
+    positions = (values - low) / delta
+    left = np.minimum(positions.astype('int64'), grid_size - 2)
+    right_weight = positions - left
+    weights = (
+            np.bincount(left, 1 - right_weight, grid_size) +
+            np.bincount(left + 1, right_weight, grid_size))
+
+    half = min(grid_size - 1, int(np.ceil(4 * bandwidth / delta)))
+    offsets = np.arange(-half, half + 1) * delta / bandwidth
+    kernel = np.exp(-0.5 * offsets ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+
+    size = 1 << int(np.ceil(np.log2(grid_size + 2 * half + 1)))
+    density = np.fft.irfft(
+                    np.fft.rfft(weights, size) * np.fft.rfft(kernel, size),
+                    size)[half:half + grid_size]
+    return grid, np.maximum(density, 0) / n
+
+
+def histogram2d(x, y, bins=100):
+    """
+    Counts the (x, y) pairs that fall in every cell of a bins x bins grid.
+    Returns the x centers, the y centers and the counts as a
+    (y, x) matrix, with nan in the empty cells.
+    :param x: numpy array
+        x values, without nans
+    :param y: numpy array
+        y values, without nans
+    :param bins: int, default: 100
+        number of bins per axis
+    """
+
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    counts[counts == 0] = np.nan
+    x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+    return x_centers, y_centers, counts.T
+
+
+def _distribution(values, grid_size):
+    """
+    Computes the histogram and kde of one column,
+    using std / 8 as bin size.
+    """
+
+    values = np.asarray(values, dtype='float64')
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return None, None
+    return histogram(values, values.std(ddof=1) / 8), kde(values, grid_size)
+
+
+def distributions(data, grid_size=512, workers=None):
+    """
+    Computes the histogram and kde of every column of a pandas
+    Dataframe, in parallel across columns.
+    Returns a list with a (histogram, kde) tuple per column,
+    see histogram and kde for their content.
+    :param data: pandas dataframe
+        every column is a distribution
+    :param grid_size: int, default: 512
+        number of points of the kde grid
+    :param workers: int, default: None
+        number of threads, if None the number of cpus is used
+    """
+
+    columns = [data.iloc[:, i].values for i in range(data.shape[1])]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(columns))
+
+    if workers <= 1:
+        return [_distribution(values, grid_size) for values in columns]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(
+                            _distribution,
+                            columns,
+                            [grid_size] * len(columns)))
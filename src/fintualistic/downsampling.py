@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+
+_methods = ('lttb', 'minmax')
+
+
+def _bucket_arg(values, edges, reducer):
+    """
+    Returns, for every bucket, the position of the first element
+    where reducer (np.minimum or np.maximum) is reached.
+    :param values: numpy array
+        values to search
+    :param edges: numpy array
+        bucket boundaries, bucket k is values[edges[k]:edges[k + 1]]
+    :param reducer: numpy ufunc
+        np.minimum or np.maximum
+    """
+
+    counts = np.diff(edges)
+    extreme = reducer.reduceat(values, edges[:-1])
+    hits = np.flatnonzero(values == np.repeat(extreme, counts))
+    buckets = np.searchsorted(edges, hits, side='right') - 1
+    first = np.unique(buckets, return_index=True)[1]
+    return hits[first]
+
+
+def _as_float(x):
+    """
+    Converts an index to float64 positions, dates are converted to
+    nanoseconds since epoch and non numeric indexes to row numbers.
+    """
+
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype('float64')
+    if pd.api.types.is_numeric_dtype(x):
+        return np.asarray(x, dtype='float64')
+    return np.arange(len(x), dtype='float64')
+
+
+def _keep_extremes(positions, y, edges):
+    """
+    Replaces the selected points of the buckets that hold the global
+    minimum and maximum of y with them. When both are in the same
+    bucket, the slot of a neighbouring bucket is also taken.
+    :param positions: numpy array
+        first point, one point per bucket and last point
+    :param y: numpy array
+        y values
+    :param edges: numpy array
+        bucket boundaries, bucket k is y[edges[k]:edges[k + 1]]
+    """
+
+    n_buckets = len(edges) - 1
+    extremes = {}
+    for position in (int(np.argmin(y)), int(np.argmax(y))):
+        # the first and last points are always kept
+        if 0 < position < len(y) - 1:
+            bucket = int(np.searchsorted(edges, position, side='right')) - 1
+            extremes.setdefault(bucket, set()).add(position)
+
+    for bucket, found in extremes.items():
+        found = sorted(found)
+        if len(found) == 1:
+            positions[bucket + 1] = found[0]
+            continue
+        if bucket + 1 < n_buckets:
+            slots = [bucket + 1, bucket + 2]
+        elif bucket > 0:
+            slots = [bucket, bucket + 1]
+        else:
+            # a single bucket, only the maximum fits
+            positions[bucket + 1] = int(np.argmax(y))
+            continue
+        positions[slots] = found
+    return positions
+
+
+def lttb(x, y, n_out):
+    """
+    Approximate Largest Triangle Three Buckets downsampling.
+    Returns the positions of the n_out points that keep the visual
+    shape of the line. The first and last points and the global
+    minimum and maximum are always kept.
+    The anchor of every bucket is taken from a first pass over the
+    bucket means and refined once with the selected points, so every
+    step is vectorized instead of walking the buckets one by one.
+    The points can differ from the sequential algorithm, whose anchor
+    is the point just selected in the previous bucket.
+    :param x: numpy array
+        x values, must be sorted
+    :param y: numpy array
+        y values, without nans
+    :param n_out: int
+        number of points to keep
+    """
+
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # inner points are split in n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype('int64')
+    counts = np.diff(edges)
+    px = x[edges[0]:edges[-1]]
+    py = y[edges[0]:edges[-1]]
+    bucket_edges = edges - 1
+
+    mean_x = np.add.reduceat(px, bucket_edges[:-1]) / counts
+    mean_y = np.add.reduceat(py, bucket_edges[:-1]) / counts
+    cx = np.repeat(np.append(mean_x[1:], x[-1]), counts)
+    cy = np.repeat(np.append(mean_y[1:], y[-1]), counts)
+
+    ax = np.append(x[0], mean_x[:-1])
+    ay = np.append(y[0], mean_y[:-1])
+    for _ in range(2):
+        area = np.abs(
+                    (np.repeat(ax, counts) - cx) *
+                    (py - np.repeat(ay, counts)) -
+                    (np.repeat(ax, counts) - px) *
+                    (cy - np.repeat(ay, counts)))
+        selected = _bucket_arg(area, bucket_edges, np.maximum)
+        ax = np.append(x[0], px[selected[:-1]])
+        ay = np.append(y[0], py[selected[:-1]])
+
+    positions = np.concatenate(([0], selected + 1, [n - 1]))
+    return _keep_extremes(positions, y, edges)
+
+
+def minmax(y, n_out):
+    """
+    Min/max per bucket downsampling.
+    Returns the positions of the minimum and maximum of
+    (n_out - 2) / 2 buckets, so every peak and drawdown of the line is kept.
+    The first and last points are always kept.
+    :param y: numpy array
+        y values, without nans
+    :param n_out: int
+        number of points to keep
+    """
+
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(0, n, (n_out - 2) // 2 + 1).astype('int64')
+    positions = np.concatenate((
+                        [0, n - 1],
+                        _bucket_arg(y, edges, np.minimum),
+                        _bucket_arg(y, edges, np.maximum)))
+    return np.unique(positions)
+
+
+def downsample(series, max_points, method='lttb'):
+    """
+    Downsamples every column of a pandas Serie or Dataframe
+    to at most max_points points. Missing values are dropped before
+    downsampling, so every column keeps its own index.
+    Returns a list with one pandas serie per column
+    and the number of points that were dropped.
+    :param series: pandas dataframe or serie
+        data to downsample, each column represents a serie
+    :param max_points: int
+        maximum number of points per serie
+    :param method: str, default: 'lttb'
+        'lttb' for an approximate Largest Triangle Three Buckets
+        that keeps the global minimum and maximum,
+        'minmax' for the minimum and maximum of every bucket
+    """
+
+    if method not in _methods:
+        raise ValueError(
+                    "method must be one of {}, got {!r}".format(
+                        _methods, method))
+
+    if isinstance(series, pd.Series):
+        data = series.to_frame(series.name)
+    else:
+        data = series
+
+    result = []
+    dropped = 0
+    for i in range(data.shape[1]):
+        serie = data.iloc[:, i]
+        clean = serie.dropna()
+        if method == 'lttb':
+            positions = lttb(_as_float(clean.index), clean.values, max_points)
+        else:
+            positions = minmax(clean.values, max_points)
+        result.append(clean.iloc[positions])
+        dropped += len(serie) - len(positions)
+
+    return result, dropped
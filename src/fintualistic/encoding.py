@@ -0,0 +1,103 @@
+import base64
+
+import numpy as np
+import pandas as pd
+
+
+# plotly.js typed array codes of the numpy dtypes that can be encoded
+_dtype_codes = {
+            'float64': 'f8',
+            'float32': 'f4',
+            'int32': 'i4',
+            'uint32': 'u4',
+            'int16': 'i2',
+            'uint16': 'u2',
+            'int8': 'i1',
+            'uint8': 'u1'}
+
+_array_keys = ('x', 'y', 'z', 'open', 'high', 'low', 'close')
+
+
+def dates_to_ms(index):
+    """
+    Converts a pandas DatetimeIndex to float64 milliseconds since epoch,
+    which plotly reads as dates on a date axis. Timezone aware dates
+    keep their wall time, as plotly shows them. Missing dates are nan.
+    :param index: pandas DatetimeIndex
+        dates to convert
+    """
+
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    ms = index.values.astype('datetime64[ms]').astype('int64')
+    ms = ms.astype('float64')
+    ms[index.isna()] = np.nan
+    return ms
+
+
+def encode_array(values, float32=False):
+    """
+    Encodes a numeric array as a plotly.js typed array spec,
+    a dict with the dtype code and the little endian bytes in base64.
+    64 bit integers are encoded as float64, plotly.js has no int64.
+    :param values: numpy array
+        numeric values
+    :param float32: boolean, default: False
+        True to encode floats as float32, halving their size
+    """
+
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        dtype = 'float32' if float32 else 'float64'
+    elif values.dtype.name in _dtype_codes:
+        dtype = values.dtype.name
+    else:
+        dtype = 'float64'
+    dtype = np.dtype(dtype).newbyteorder('<')
+    array = np.ascontiguousarray(values, dtype=dtype)
+    return {
+            'dtype': _dtype_codes[dtype.name],
+            'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def _encodable(values):
+    """
+    True if values is a numeric numpy array.
+    """
+
+    return (
+            isinstance(values, np.ndarray) and
+            values.dtype.kind in 'fiub' and
+            values.size > 0)
+
+
+def to_compact_dict(fig, float32=False):
+    """
+    Returns the figure as a dict where the numeric x, y, z and ohlc
+    arrays of every trace are base64 typed arrays instead of lists of numbers,
+    which makes the html or json output several times smaller and
+    faster to write and to load in the browser.
+    Dates are only encoded if they were given as milliseconds,
+    see dates_to_ms.
+    :param fig: plotly figure or dict
+        figure to encode
+    :param float32: boolean, default: False
+        True to encode floats as float32
+    """
+
+    if isinstance(fig, dict):
+        fig_dict = dict(fig)
+    else:
+        fig_dict = fig.to_plotly_json()
+    data = []
+    for trace in fig_dict['data']:
+        trace = dict(trace)
+        for key in _array_keys:
+            values = trace.get(key)
+            if isinstance(values, (pd.Series, pd.Index)):
+                values = values.values
+            if _encodable(values):
+                trace[key] = encode_array(values, float32)
+        data.append(trace)
+    fig_dict['data'] = data
+    return fig_dict
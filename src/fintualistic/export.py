@@ -0,0 +1,236 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+_logger = logging.getLogger(__name__)
+
+_image_formats = ('png', 'svg', 'pdf', 'jpeg', 'webp')
+
+
+class _ScopeRenderer:
+    """
+    Renderer of kaleido 0.2, a chromium process kept alive
+    between exports.
+    """
+
+    def __init__(self, scope_class):
+        import plotly
+
+        plotlyjs = os.path.join(
+                        os.path.dirname(os.path.abspath(plotly.__file__)),
+                        'package_data',
+                        'plotly.min.js')
+        self.scope = scope_class(plotlyjs=plotlyjs, mathjax=False)
+
+    def transform(self, fig_dict, format, width, height, scale):
+        return self.scope.transform(
+                            fig_dict,
+                            format=format,
+                            width=width,
+                            height=height,
+                            scale=scale)
+
+    def close(self):
+        # kaleido 0.2 has no public way to stop its process
+        self.scope._shutdown_kaleido()
+
+
+class _SyncRenderer:
+    """
+    Renderer of kaleido 1.x, which manages its own browser.
+    """
+
+    def __init__(self, kaleido):
+        self.kaleido = kaleido
+
+    def transform(self, fig_dict, format, width, height, scale):
+        options = {'format': format, 'width': width, 'height': height,
+                   'scale': scale}
+        return self.kaleido.calc_fig_sync(
+                    fig_dict,
+                    opts={key: value for key, value in options.items()
+                          if value is not None})
+
+    def close(self):
+        pass
+
+
+class ExportEngine:
+    """
+    Exports figures as static images with a pool of kaleido renderers.
+    With kaleido 0.2 every renderer is a chromium process that is
+    started on first use and kept alive until close() is called, so
+    exports after the first one do not pay the startup cost. kaleido 1.x
+    manages its own browser, which also needs Chrome to be installed.
+    Exports run concurrently, one per renderer, and the latency of every
+    image is recorded in records.
+    Requires the kaleido package, pip install fintualistic[export].
+    :param workers: int, default: 2
+        number of renderers
+    """
+
+    def __init__(self, workers=2):
+        self.workers = workers
+        self.records = []
+        self._scopes = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def _new_scope(self):
+        """
+        Starts a kaleido renderer, with kaleido 0.2 it uses the plotly.js
+        bundled with plotly, so no network access is needed.
+        """
+
+        try:
+            import kaleido
+        except ImportError:
+            raise ImportError(
+                    'Static image export requires kaleido, '
+                    'install it with: pip install kaleido') from None
+        try:
+            from kaleido.scopes.plotly import PlotlyScope
+        except ImportError:
+            PlotlyScope = None
+        if PlotlyScope is not None:
+            return _ScopeRenderer(PlotlyScope)
+        if hasattr(kaleido, 'calc_fig_sync'):
+            return _SyncRenderer(kaleido)
+        raise ImportError(
+                'kaleido {} is not supported, install kaleido 0.2 or '
+                '1.x'.format(getattr(kaleido, '__version__', '')))
+
+    def _acquire(self):
+        """
+        Returns an idle renderer, starting a new one
+        while the pool is smaller than workers.
+        """
+
+        with self._lock:
+            start = self._scopes.empty() and self._started < self.workers
+            if start:
+                self._started += 1
+        if start:
+            try:
+                return self._new_scope()
+            except Exception:
+                with self._lock:
+                    self._started -= 1
+                raise
+        return self._scopes.get()
+
+    def to_image(self, fig, format='png', width=None, height=None,
+                 scale=None):
+        """
+        Returns a figure as static image bytes.
+        :param fig: plotly figure or dict
+            figure to export
+        :param format: str, default: 'png'
+            'png', 'svg', 'pdf', 'jpeg' or 'webp'
+        :param width: int, default: None
+            width of the image in pixels, if None kaleido's default is used
+        :param height: int, default: None
+            height of the image in pixels, if None kaleido's default is used
+        :param scale: float, default: None
+            scale factor of the image
+        """
+
+        if format not in _image_formats:
+            raise ValueError(
+                        "format must be one of {}, got {!r}".format(
+                            _image_formats, format))
+
+        if isinstance(fig, dict):
+            fig_dict = fig
+        else:
+            fig_dict = fig.to_plotly_json()
+        scope = self._acquire()
+        try:
+            return scope.transform(fig_dict, format, width, height, scale)
+        finally:
+            self._scopes.put(scope)
+
+    def export(self, fig, path, format=None, width=None, height=None,
+               scale=None):
+        """
+        Writes a figure as a static image.
+        Returns the time it took in seconds.
+        :param fig: plotly figure or dict
+            figure to export
+        :param path: str
+            path of the image file
+        :param format: str, default: None
+            'png', 'svg', 'pdf', 'jpeg' or 'webp',
+            if None, it is taken from the path extension
+        :param width: int, default: None
+            width of the image in pixels, if None kaleido's default is used
+        :param height: int, default: None
+            height of the image in pixels, if None kaleido's default is used
+        :param scale: float, default: None
+            scale factor of the image
+        """
+
+        if format is None:
+            format = os.path.splitext(path)[1][1:].lower()
+
+        start = time.perf_counter()
+        image = self.to_image(fig, format, width, height, scale)
+        with open(path, 'wb') as f:
+            f.write(image)
+        seconds = time.perf_counter() - start
+
+        self.records.append(
+                        {'path': path, 'format': format, 'seconds': seconds})
+        _logger.debug('Exported %s in %.3f seconds', path, seconds)
+        return seconds
+
+    def export_many(self, jobs):
+        """
+        Writes many figures as static images, concurrently
+        across the renderers of the pool.
+        Returns the time each image took in seconds, in order.
+        :param jobs: list of tuple
+            (fig, path) pairs, the format is taken from the path extension
+        """
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(
+                                lambda job: self.export(*job),
+                                jobs))
+
+    def close(self):
+        """
+        Stops every renderer of the pool.
+        """
+
+        with self._lock:
+            while not self._scopes.empty():
+                self._scopes.get().close()
+            self._started = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Returns the export engine shared by the plot functions,
+    it is created on first use.
+    """
+
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = ExportEngine()
+    return _engine
@@ -0,0 +1,368 @@
+import json
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+
+_page = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8" />
+<title>{title}</title>
+<script src="/plotly.min.js"></script>
+</head>
+<body style="background-color: #F3F6FA; margin: 0;">
+<div id="live" style="height: 100vh;"></div>
+<script type="text/javascript">
+var div = document.getElementById('live');
+var source = new EventSource('/events');
+source.onmessage = function(event) {{
+    var message = JSON.parse(event.data);
+    if (message.figure) {{
+        var fig = message.figure;
+        Plotly.react(div, fig.data, fig.layout, {{responsive: true}});
+    }} else {{
+        Plotly.extendTraces(
+            div,
+            {{x: message.x, y: message.y}},
+            message.indices,
+            message.max_points);
+    }}
+}};
+</script>
+</body>
+</html>
+"""
+
+# pending messages per browser, a slower browser gets a full snapshot
+_client_queue_size = 1000
+
+
+class _RingBuffer:
+    """
+    Fixed size buffer with the last maxlen (x, y) points of a serie.
+    """
+
+    def __init__(self, maxlen):
+        self.maxlen = maxlen
+        self.x = None
+        self.y = np.empty(maxlen, dtype='float64')
+        self.start = 0
+        self.count = 0
+
+    def extend(self, x, y):
+        """
+        Appends the points, keeping only the last maxlen.
+        """
+
+        if self.x is None:
+            if x.dtype.kind == 'M':
+                self.x = np.empty(self.maxlen, dtype='datetime64[ns]')
+            else:
+                self.x = np.empty(self.maxlen, dtype='float64')
+        x = x[-self.maxlen:]
+        y = y[-self.maxlen:]
+
+        end = self.start + self.count
+        positions = (end + np.arange(len(x))) % self.maxlen
+        self.x[positions] = x
+        self.y[positions] = y
+        overflow = max(0, self.count + len(x) - self.maxlen)
+        self.start = (self.start + overflow) % self.maxlen
+        self.count = min(self.count + len(x), self.maxlen)
+
+    def values(self):
+        """
+        Returns copies of the x and y values in order.
+        """
+
+        if self.x is None:
+            return np.array([]), np.array([])
+        positions = (self.start + np.arange(self.count)) % self.maxlen
+        return self.x[positions], self.y[positions]
+
+
+def _to_list(x):
+    """
+    Converts x values to a json friendly list, dates as iso strings.
+    """
+
+    if x.dtype.kind == 'M':
+        return np.datetime_as_string(x, unit='ms').tolist()
+    return x.tolist()
+
+
+class LiveSeries:
+    """
+    Line chart that is updated while new points arrive, with the same
+    style as plot_series. Every serie keeps its last max_points points
+    in a ring buffer, so memory and update cost stay constant no matter
+    how long the session runs. Updates are pushed to a FigureWidget
+    (see widget) and to a local html page (see serve), where only the
+    new points are sent and added with Plotly.extendTraces.
+    :param names: list of str
+        names of the series, displayed as legend
+    :param max_points: int, default: 5000
+        number of points kept per serie
+    :param kwargs:
+        style arguments of plot_series, e.g. title, suptitle,
+        ylabel, xlabel, marker, title_size or showlegend
+    """
+
+    def __init__(self, names, max_points=5000, **kwargs):
+        from . import plot_series
+
+        self.names = list(names)
+        self.max_points = max_points
+        self._buffers = [_RingBuffer(max_points) for _ in self.names]
+        self._lock = threading.RLock()
+        self._clients = []
+        self._server = None
+        self._widget = None
+
+        empty = pd.DataFrame(
+                        {name: pd.Series(dtype='float64')
+                         for name in self.names})
+        self._figure = plot_series(
+                            empty,
+                            save=False,
+                            show=False,
+                            render='svg',
+                            **kwargs)
+
+    def append(self, name, x, y):
+        """
+        Appends one point or a mini batch of points to a serie.
+        :param name: str
+            name of the serie
+        :param x: scalar or array
+            x values, usually timestamps
+        :param y: scalar or array
+            y values
+        """
+
+        self.extend({name: (x, y)})
+
+    def extend(self, points):
+        """
+        Appends points to several series at once,
+        sending a single update to the browsers.
+        :param points: dict
+            name of the serie: (x, y) with scalars or arrays
+        """
+
+        indices = []
+        xs = []
+        ys = []
+        with self._lock:
+            for name, (x, y) in points.items():
+                i = self.names.index(name)
+                x = np.atleast_1d(np.asarray(x))
+                if x.dtype.kind == 'O':
+                    x = pd.to_datetime(x).values
+                y = np.atleast_1d(np.asarray(y, dtype='float64'))
+                self._buffers[i].extend(x, y)
+                indices.append(i)
+                xs.append(_to_list(x[-self.max_points:]))
+                ys.append(y[-self.max_points:].tolist())
+
+            if self._clients:
+                self._publish({
+                            'indices': indices,
+                            'x': xs,
+                            'y': ys,
+                            'max_points': self.max_points})
+
+        if self._widget is not None:
+            self._update_widget(indices)
+
+    def to_frame(self):
+        """
+        Returns the points in the buffers as a pandas dataframe,
+        each column represents a serie.
+        """
+
+        with self._lock:
+            series = []
+            for name, buffer in zip(self.names, self._buffers):
+                x, y = buffer.values()
+                series.append(pd.Series(y, index=x, name=name))
+        return pd.concat(series, axis=1)
+
+    def figure(self):
+        """
+        Returns a plotly figure with the points in the buffers.
+        """
+
+        import plotly.graph_objects as go
+
+        fig = go.Figure(self._figure)
+        with self._lock:
+            for trace, buffer in zip(fig.data, self._buffers):
+                trace.x, trace.y = buffer.values()
+        return fig
+
+    def widget(self):
+        """
+        Returns a plotly FigureWidget for jupyter that is updated
+        with every append. plotly.py has no extendTraces, so every
+        update sends the window of the updated series,
+        which is bounded by max_points.
+        Requires ipywidgets.
+        """
+
+        import plotly.graph_objects as go
+
+        if self._widget is None:
+            self._widget = go.FigureWidget(self.figure())
+        return self._widget
+
+    def _update_widget(self, indices):
+        """
+        Copies the buffers of the updated series to the widget.
+        """
+
+        with self._lock:
+            values = {i: self._buffers[i].values() for i in indices}
+        with self._widget.batch_update():
+            for i, (x, y) in values.items():
+                self._widget.data[i].x = x
+                self._widget.data[i].y = y
+
+    def _snapshot(self):
+        """
+        Returns the message with the whole figure,
+        sent to a browser when it connects.
+        """
+
+        import plotly.io as pio
+
+        return {'figure': json.loads(pio.to_json(self.figure()))}
+
+    def _publish(self, message):
+        """
+        Queues a message for every connected browser, a browser with a
+        full queue gets None instead, asking for a new snapshot.
+        Must be called holding the lock.
+        """
+
+        for client in self._clients:
+            try:
+                client.put_nowait(message)
+            except queue.Full:
+                with client.mutex:
+                    client.queue.clear()
+                client.put_nowait(None)
+
+    def serve(self, host='127.0.0.1', port=0):
+        """
+        Starts a local web server in a background thread with a page
+        that shows the chart and receives the new points as
+        server sent events.
+        Returns the url of the page.
+        :param host: str, default: '127.0.0.1'
+            address to listen on
+        :param port: int, default: 0
+            port to listen on, 0 picks a free port
+        """
+
+        from plotly.offline import get_plotlyjs
+
+        if self._server is not None:
+            return self.url
+
+        live = self
+        page = _page.format(title='Fintualistic').encode('utf-8')
+        plotlyjs = get_plotlyjs().encode('utf-8')
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, content, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def _event(self, message):
+                data = json.dumps(message, separators=(',', ':'))
+                self.wfile.write(
+                            'data: {}\n\n'.format(data).encode('utf-8'))
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == '/':
+                    self._send(page, 'text/html; charset=utf-8')
+                elif self.path == '/plotly.min.js':
+                    self._send(plotlyjs, 'application/javascript')
+                elif self.path == '/events':
+                    self._stream()
+                else:
+                    self.send_error(404)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+
+                client = queue.Queue(maxsize=_client_queue_size)
+                with live._lock:
+                    live._clients.append(client)
+                    snapshot = live._snapshot()
+                try:
+                    self._event(snapshot)
+                    while True:
+                        try:
+                            message = client.get(timeout=15)
+                        except queue.Empty:
+                            self.wfile.write(b': keepalive\n\n')
+                            self.wfile.flush()
+                            continue
+                        if message is None:
+                            # the browser fell behind, send everything
+                            with live._lock:
+                                with client.mutex:
+                                    client.queue.clear()
+                                message = live._snapshot()
+                        self._event(message)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with live._lock:
+                        live._clients.remove(client)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        thread = threading.Thread(
+                            target=self._server.serve_forever,
+                            daemon=True)
+        thread.start()
+        return self.url
+
+    @property
+    def url(self):
+        """
+        Url of the page started by serve, None if it is not running.
+        """
+
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return 'http://{}:{}/'.format(host, port)
+
+    def close(self):
+        """
+        Stops the web server started by serve.
+        """
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
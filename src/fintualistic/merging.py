@@ -0,0 +1,92 @@
+import numpy as np
+
+
+# html post script that draws the hovered serie of a merged trace on
+# top, in the last trace of the figure, named after the serie
+highlight_script = """
+var gd = document.getElementById('{plot_id}');
+var highlighted = null;
+gd.on('plotly_hover', function(event) {
+    var point = event.points[0];
+    var meta = point.fullData.meta;
+    if (!meta || !meta.starts) {
+        return;
+    }
+    var starts = meta.starts;
+    var low = 0;
+    var high = starts.length - 1;
+    while (low < high) {
+        var middle = (low + high + 1) >> 1;
+        if (starts[middle] <= point.pointNumber) {
+            low = middle;
+        } else {
+            high = middle - 1;
+        }
+    }
+    var key = point.curveNumber + ':' + low;
+    if (key === highlighted) {
+        return;
+    }
+    highlighted = key;
+    var end = low + 1 < starts.length ? starts[low + 1] - 1 : Infinity;
+    var x = point.fullData.x;
+    var y = point.fullData.y;
+    Plotly.restyle(gd, {
+        x: [Array.prototype.slice.call(x, starts[low], end)],
+        y: [Array.prototype.slice.call(y, starts[low], end)],
+        name: meta.names[low],
+        'line.color': point.fullData.line.color,
+        visible: true
+    }, [gd.data.length - 1]);
+});
+"""
+
+
+def post_script(fig):
+    """
+    Returns highlight_script if the figure has merged traces, else None.
+    """
+
+    if isinstance(fig, dict):
+        metas = [trace.get('meta') for trace in fig['data']]
+    else:
+        metas = [trace.meta for trace in fig.data]
+    for meta in metas:
+        if isinstance(meta, dict) and 'starts' in meta:
+            return highlight_script
+    return None
+
+
+def merge_series(columns, groups):
+    """
+    Packs series in one (x, y) pair per group, separated by a nan,
+    so they are drawn as independent lines of a single trace.
+    Returns a list with (names, starts, x, y) per group, where starts
+    are the positions of the first point of every serie.
+    :param columns: list of pandas series
+        series to merge
+    :param groups: int
+        number of groups, serie i goes to group i % groups
+    """
+
+    merged = []
+    for group in range(min(groups, len(columns))):
+        names = []
+        starts = []
+        pieces = []
+        values = []
+        position = 0
+        for serie in columns[group::groups]:
+            if len(serie) == 0:
+                continue
+            names.append(str(serie.name))
+            starts.append(position)
+            # the x of the gap repeats the last x, the nan breaks the line
+            pieces.extend((serie.index, serie.index[-1:]))
+            values.extend((serie.to_numpy(dtype='float64'), [np.nan]))
+            position += len(serie) + 1
+        if not names:
+            continue
+        x = pieces[0].append(pieces[1:])
+        merged.append((names, starts, x, np.concatenate(values)))
+    return merged
@@ -0,0 +1,268 @@
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import time
+import tracemalloc
+
+
+# profilers that receive the records, see Profiler.start
+_profilers = []
+_lock = threading.Lock()
+
+# plot call being profiled in the current thread or task
+_current = contextvars.ContextVar('fintualistic_call', default=None)
+
+_call_ids = itertools.count(1)
+
+
+class _Call:
+    """
+    Stage timer of one plot call.
+    """
+
+    def __init__(self, function, memory):
+        self.id = next(_call_ids)
+        self.function = function
+        self.memory = memory
+        self.start = time.time()
+        self.clock = time.perf_counter()
+        self.stage = None
+        self.records = []
+
+    def begin(self, stage):
+        """
+        Ends the running stage and starts the next one.
+        """
+
+        self.end()
+        self.stage = stage
+        self.stage_start = time.time()
+        self.stage_clock = time.perf_counter()
+        if self.memory:
+            tracemalloc.reset_peak()
+            self.stage_memory = tracemalloc.get_traced_memory()[0]
+
+    def end(self):
+        """
+        Ends the running stage and records it.
+        """
+
+        if self.stage is None:
+            return
+        peak = None
+        if self.memory:
+            peak = tracemalloc.get_traced_memory()[1] - self.stage_memory
+        self.records.append({
+                    'call': self.id,
+                    'function': self.function,
+                    'stage': self.stage,
+                    'start': self.stage_start,
+                    'seconds': time.perf_counter() - self.stage_clock,
+                    'peak_bytes': peak})
+        self.stage = None
+
+
+def stage(name):
+    """
+    Marks the start of a stage of the running plot call,
+    the previous stage ends here. Does nothing when no profiler is on.
+    :param name: str
+        name of the stage, e.g. 'prep', 'traces', 'layout',
+        'serialize' or 'show'
+    """
+
+    if _profilers:
+        call = _current.get()
+        if call is not None:
+            call.begin(name)
+
+
+def profiled(function):
+    """
+    Decorator that records the stages of a plot function
+    while a profiler is on. The first stage is 'prep'.
+    """
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not _profilers or _current.get() is not None:
+            return function(*args, **kwargs)
+
+        call = _Call(function.__name__, tracemalloc.is_tracing())
+        token = _current.set(call)
+        try:
+            call.begin('prep')
+            return function(*args, **kwargs)
+        finally:
+            call.end()
+            _current.reset(token)
+            call.records.append({
+                    'call': call.id,
+                    'function': call.function,
+                    'stage': 'total',
+                    'start': call.start,
+                    'seconds': time.perf_counter() - call.clock,
+                    'peak_bytes': None})
+            with _lock:
+                profilers = list(_profilers)
+            for profiler in profilers:
+                profiler._add(call.records)
+
+    return wrapper
+
+
+class Profiler:
+    """
+    Records the wall time and the tracemalloc peak of every stage of
+    the plot calls made while it is on: 'cache' (render cache lookup),
+    'prep' (pandas preparation), 'traces' (trace construction),
+    'layout' (layout and style), 'serialize' (saving the files) and
+    'show', plus a 'total' record per call.
+    Use it as a context manager or with start and stop. The memory
+    peak is process wide, so it is only exact for one call at a time.
+    :param memory: boolean, default: True
+        True to trace memory with tracemalloc, which slows python down
+    :param hook: callable, default: None
+        function called with every record as it is produced
+    """
+
+    def __init__(self, memory=True, hook=None):
+        self.memory = memory
+        self.hook = hook
+        self.records = []
+        self._started_tracing = False
+
+    def start(self):
+        """
+        Starts recording the plot calls.
+        """
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        with _lock:
+            _profilers.append(self)
+        return self
+
+    def stop(self):
+        """
+        Stops recording the plot calls.
+        """
+
+        with _lock:
+            if self in _profilers:
+                _profilers.remove(self)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _add(self, records):
+        self.records.extend(records)
+        if self.hook is not None:
+            for record in records:
+                self.hook(record)
+
+    def summary(self):
+        """
+        Returns a dict with the total seconds and the maximum peak bytes
+        of every stage, over all the recorded calls.
+        """
+
+        result = {}
+        for record in self.records:
+            stage = result.setdefault(
+                            record['stage'],
+                            {'calls': 0, 'seconds': 0.0, 'peak_bytes': None})
+            stage['calls'] += 1
+            stage['seconds'] += record['seconds']
+            if record['peak_bytes'] is not None:
+                stage['peak_bytes'] = max(
+                                    stage['peak_bytes'] or 0,
+                                    record['peak_bytes'])
+        return result
+
+    def to_spans(self, service_name='fintualistic'):
+        """
+        Returns the records as an OpenTelemetry OTLP/JSON trace payload,
+        one trace per plot call with a child span per stage.
+        :param service_name: str, default: 'fintualistic'
+            service.name attribute of the spans
+        """
+
+        traces = {}
+        for record in self.records:
+            if record['call'] not in traces:
+                traces[record['call']] = os.urandom(16).hex()
+
+        roots = {
+                record['call']: os.urandom(8).hex()
+                for record in self.records if record['stage'] == 'total'}
+
+        spans = []
+        for record in self.records:
+            start = int(record['start'] * 1e9)
+            span = {
+                'traceId': traces[record['call']],
+                'name': '{}.{}'.format(record['function'], record['stage']),
+                'kind': 1,
+                'startTimeUnixNano': str(start),
+                'endTimeUnixNano': str(start + int(record['seconds'] * 1e9)),
+                'attributes': [
+                        {'key': 'fintualistic.function',
+                         'value': {'stringValue': record['function']}},
+                        {'key': 'fintualistic.stage',
+                         'value': {'stringValue': record['stage']}}]}
+            if record['stage'] == 'total':
+                span['spanId'] = roots[record['call']]
+                span['name'] = record['function']
+            else:
+                span['spanId'] = os.urandom(8).hex()
+                if record['call'] in roots:
+                    span['parentSpanId'] = roots[record['call']]
+            if record['peak_bytes'] is not None:
+                span['attributes'].append({
+                        'key': 'fintualistic.peak_bytes',
+                        'value': {'intValue': str(record['peak_bytes'])}})
+            spans.append(span)
+
+        return {'resourceSpans': [{
+                    'resource': {'attributes': [{
+                            'key': 'service.name',
+                            'value': {'stringValue': service_name}}]},
+                    'scopeSpans': [{
+                            'scope': {'name': 'fintualistic'},
+                            'spans': spans}]}]}
+
+    def export_spans(self, endpoint='http://localhost:4318/v1/traces',
+                     service_name='fintualistic', timeout=10):
+        """
+        Sends the records as OpenTelemetry spans to a local collector
+        with the OTLP/HTTP JSON protocol.
+        Returns the http status code.
+        :param endpoint: str, default: 'http://localhost:4318/v1/traces'
+            url of the collector traces endpoint
+        :param service_name: str, default: 'fintualistic'
+            service.name attribute of the spans
+        :param timeout: float, default: 10
+            seconds to wait for the collector
+        """
+
+        import json
+        import urllib.request
+
+        body = json.dumps(self.to_spans(service_name)).encode('utf-8')
+        request = urllib.request.Request(
+                            endpoint,
+                            data=body,
+                            headers={'Content-Type': 'application/json'},
+                            method='POST')
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status
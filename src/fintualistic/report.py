@@ -0,0 +1,155 @@
+import html
+import os
+
+
+_page = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8" />
+<title>{title}</title>
+{plotlyjs}
+<style>
+body {{
+    background-color: #F3F6FA;
+    font-family: Helvetica;
+    margin: 0 auto;
+    max-width: 1400px;
+}}
+.fintualistic-figure {{
+    width: 100%;
+    margin-bottom: 40px;
+}}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{figures}
+<script type="text/javascript">
+(function() {{
+    function draw(div) {{
+        var source = document.getElementById(div.dataset.figure);
+        var fig = JSON.parse(source.textContent);
+        Plotly.newPlot(div, fig.data, fig.layout, {{responsive: true}});
+    }}
+    var divs = document.querySelectorAll('.fintualistic-figure');
+    if (!('IntersectionObserver' in window)) {{
+        divs.forEach(draw);
+        return;
+    }}
+    var observer = new IntersectionObserver(function(entries) {{
+        entries.forEach(function(entry) {{
+            if (entry.isIntersecting) {{
+                observer.unobserve(entry.target);
+                draw(entry.target);
+            }}
+        }});
+    }}, {{rootMargin: '400px 0px'}});
+    divs.forEach(function(div) {{ observer.observe(div); }});
+}})();
+</script>
+</body>
+</html>
+"""
+
+_figure = """<div class="fintualistic-figure" id="{id}" data-figure="{id}-json" \
+style="height: {height}px;"></div>
+<script type="application/json" id="{id}-json">{json}</script>"""
+
+_include_modes = ('inline', 'directory', 'cdn')
+
+_default_height = 600
+
+
+class Report:
+    """
+    Collects the figures returned by the plot functions and writes them
+    in a single html file. plotly.js is included once for the whole
+    report and every figure is drawn only when it is scrolled into view.
+    :param title: str, default: 'Fintualistic'
+        title of the html page
+    """
+
+    def __init__(self, title='Fintualistic'):
+        self.title = title
+        self.figures = []
+
+    def add(self, fig):
+        """
+        Adds a figure to the report.
+        Returns the figure, so plot calls can be wrapped.
+        :param fig: plotly figure or dict
+            figure returned by a plot function, a dict with
+            validate=False
+        """
+
+        self.figures.append(fig)
+        return fig
+
+    def to_html(self, include_plotlyjs='inline'):
+        """
+        Returns the report as an html string.
+        :param include_plotlyjs: str, default: 'inline'
+            'inline' embeds plotly.js in the page,
+            'directory' loads plotly.min.js from the same directory,
+            'cdn' loads plotly.js from the plotly cdn
+        """
+
+        import plotly.io as pio
+        from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+        if include_plotlyjs not in _include_modes:
+            raise ValueError(
+                        "include_plotlyjs must be one of {}, got {!r}".format(
+                            _include_modes, include_plotlyjs))
+
+        if include_plotlyjs == 'inline':
+            plotlyjs = '<script type="text/javascript">{}</script>'.format(
+                                                            get_plotlyjs())
+        elif include_plotlyjs == 'directory':
+            plotlyjs = '<script src="plotly.min.js"></script>'
+        else:
+            plotlyjs = (
+                    '<script src="https://cdn.plot.ly/plotly-{}.min.js">'
+                    '</script>').format(get_plotlyjs_version())
+
+        figures = []
+        for i, fig in enumerate(self.figures):
+            if isinstance(fig, dict):
+                height = fig.get('layout', {}).get('height')
+            else:
+                height = fig.layout.height
+            height = height or _default_height
+            # "</" would close the script tag that holds the figure
+            json = pio.to_json(fig, validate=False).replace('</', '<\\/')
+            figures.append(_figure.format(
+                                    id='figure-{}'.format(i),
+                                    height=height,
+                                    json=json))
+
+        return _page.format(
+                        title=html.escape(self.title),
+                        plotlyjs=plotlyjs,
+                        figures='\n'.join(figures))
+
+    def write_html(self, path, include_plotlyjs='inline'):
+        """
+        Writes the report as an html file.
+        With include_plotlyjs='directory', plotly.min.js is written
+        next to the html file, so many reports can share it.
+        :param path: str
+            path of the html file
+        :param include_plotlyjs: str, default: 'inline'
+            'inline', 'directory' or 'cdn', see to_html
+        """
+
+        from plotly.offline import get_plotlyjs
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_html(include_plotlyjs))
+
+        if include_plotlyjs == 'directory':
+            directory = os.path.dirname(os.path.abspath(path))
+            bundle = os.path.join(directory, 'plotly.min.js')
+            if not os.path.exists(bundle):
+                with open(bundle, 'w', encoding='utf-8') as f:
+                    f.write(get_plotlyjs())
@@ -0,0 +1,70 @@
+import pandas as pd
+
+
+_methods = ('last', 'mean', 'ohlc')
+
+_ohlc_columns = ('open', 'high', 'low', 'close')
+
+
+def resample(data, freq, method='last'):
+    """
+    Aggregates a timeseries in calendar buckets, all the columns on the
+    same index. Buckets without data, e.g. weekends, are dropped.
+    :param data: pandas dataframe or serie
+        timeseries with a DatetimeIndex
+    :param freq: str
+        pandas frequency of the buckets, e.g. 'W', 'ME' or '15min'
+    :param method: str, default: 'last'
+        'last', 'mean' or 'ohlc' for the open, high, low and close of
+        every bucket, which adds a level to the columns of a dataframe
+    """
+
+    if method not in _methods:
+        raise ValueError(
+                    "method must be one of {}, got {!r}".format(
+                        _methods, method))
+
+    buckets = data.resample(freq)
+    if method == 'last':
+        result = buckets.last()
+    elif method == 'mean':
+        result = buckets.mean()
+    else:
+        result = buckets.ohlc()
+    return result.dropna(how='all')
+
+
+def ohlc(data, freq=None):
+    """
+    Returns a dataframe with open, high, low and close columns.
+    Prices are aggregated in buckets of freq, open, high, low and
+    close columns (in any case) are aggregated again if freq is given.
+    :param data: pandas dataframe or serie
+        prices, or a dataframe with open, high, low and close columns
+    :param freq: str, default: None
+        pandas frequency of the candles, required for prices
+    """
+
+    if isinstance(data, pd.Series):
+        if freq is None:
+            raise ValueError('freq is required to plot a serie of prices')
+        return resample(data, freq, 'ohlc')
+
+    columns = {str(column).lower(): column for column in data.columns}
+    missing = [name for name in _ohlc_columns if name not in columns]
+    if missing:
+        raise ValueError(
+                    'data must have {} columns, missing {}'.format(
+                        _ohlc_columns, missing))
+    data = data[[columns[name] for name in _ohlc_columns]]
+    data.columns = list(_ohlc_columns)
+    if freq is None:
+        return data
+
+    buckets = data.resample(freq)
+    result = pd.DataFrame({
+                'open': buckets['open'].first(),
+                'high': buckets['high'].max(),
+                'low': buckets['low'].min(),
+                'close': buckets['close'].last()})
+    return result.dropna(how='all')
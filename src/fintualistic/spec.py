@@ -0,0 +1,104 @@
+from _plotly_utils.basevalidators import (
+    copy_to_readonly_numpy_array,
+    is_homogeneous_array,
+    is_simple_array,
+    to_scalar_or_list)
+
+
+# trace properties that are data arrays, coerced as plotly's validators do
+_array_keys = ('x', 'y', 'customdata', 'text')
+
+# trace properties that are strings, numbers are converted as plotly does
+_string_keys = ('name', 'legendgroup', 'offsetgroup')
+
+
+def _coerce(value):
+    """
+    Converts a data array the way plotly's DataArrayValidator does,
+    so the serialized figure is the same.
+    """
+
+    if is_homogeneous_array(value):
+        return copy_to_readonly_numpy_array(value)
+    if is_simple_array(value):
+        return to_scalar_or_list(value)
+    return value
+
+
+def _ordered(props):
+    """
+    Returns the properties without None values, sorted by name as
+    plotly's constructors set them, nested objects too.
+    """
+
+    result = {}
+    for key in sorted(props):
+        value = props[key]
+        if value is None:
+            continue
+        if isinstance(value, dict) and key != 'meta':
+            value = _ordered(value)
+        elif key in _array_keys:
+            value = _coerce(value)
+        elif key in _string_keys and not isinstance(value, str):
+            value = str(value)
+        result[key] = value
+    return result
+
+
+def trace(type, **props):
+    """
+    Returns a trace as the plain dict that plotly would build for it,
+    without validating the properties. Nested objects are given as
+    dicts, e.g. line=dict(color='#005AD6', width=3), and properties
+    set to None are left out.
+    :param type: str
+        trace type, e.g. 'scatter', 'scattergl' or 'bar'
+    :param props:
+        properties of the trace
+    """
+
+    result = _ordered(props)
+    result['type'] = type
+    return result
+
+
+def figure(layout_fig, traces):
+    """
+    Returns a figure dict with the traces and the layout of a figure,
+    which is validated by plotly as usual since it is built once.
+    :param layout_fig: plotly figure
+        figure with the layout and no traces
+    :param traces: list of dict
+        traces built with trace
+    """
+
+    return {'data': traces, 'layout': layout_fig.to_dict()['layout']}
+
+
+def check(fig_dict):
+    """
+    Validates a figure dict built with trace and figure against
+    plotly's schema. Returns the list of differences with the figure
+    that plotly builds from the same dict, empty if they are the same.
+    Meant for tests and benchmarks, not for every chart.
+    :param fig_dict: dict
+        figure to check
+    """
+
+    import plotly.graph_objects as go
+    from plotly.io.json import to_json_plotly
+
+    expected = go.Figure(fig_dict).to_dict()
+    differences = []
+    if len(expected['data']) != len(fig_dict['data']):
+        differences.append('number of traces')
+    for i, (built, valid) in enumerate(zip(fig_dict['data'],
+                                           expected['data'])):
+        if list(built) != list(valid):
+            differences.append(
+                        'trace {} properties {} != {}'.format(
+                            i, list(built), list(valid)))
+        elif to_json_plotly(built) != to_json_plotly(valid):
+            differences.append('trace {} values'.format(i))
+    return differences
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def collapse_small(data, threshold, label='Other'):
+    """
+    Sums the columns that contribute less than threshold of the total
+    absolute value of a dataframe in a last column.
+    :param data: pandas dataframe
+        dataframe with one column per component
+    :param threshold: float
+        minimum share of the total, e.g. 0.01 for 1%
+    :param label: str, default: 'Other'
+        name of the column with the sum of the small components
+    """
+
+    values = data.to_numpy(dtype='float64')
+    totals = np.nansum(np.abs(values), axis=0)
+    small = totals < threshold * totals.sum()
+    if small.sum() < 2:
+        return data
+
+    result = data.loc[:, ~small].copy()
+    result[label] = np.nansum(values[:, small], axis=1)
+    return result
+
+
+def stack(data, normalize=False):
+    """
+    Returns the values and the cumulative sums of the columns of a
+    dataframe as two (rows, columns) arrays, missing values count as 0.
+    :param data: pandas dataframe
+        dataframe with one column per component
+    :param normalize: boolean, default: False
+        True to scale every row to sum 100
+    """
+
+    values = np.nan_to_num(data.to_numpy(dtype='float64'))
+    if normalize:
+        totals = values.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(totals != 0, 100 * values / totals, 0)
+    return values, np.cumsum(values, axis=1)
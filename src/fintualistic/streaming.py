@@ -0,0 +1,241 @@
+import collections.abc
+
+import numpy as np
+import pandas as pd
+
+
+# rows read at a time from parquet files and memory mapped arrays
+_chunk_rows = 1000000
+
+_default_resolution = 2000
+
+
+def _reduce(table, ids):
+    """
+    Reduces consecutive rows of an aggregate table with the same
+    bucket id. The table is a dict of (rows, columns) arrays: min, max
+    and last values with their x positions. Missing values are nan.
+    Returns the reduced table and the bucket id of every row.
+    """
+
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    counts = np.diff(np.r_[starts, len(ids)])
+    rows = np.arange(len(ids))[:, None]
+    far = len(ids)
+
+    result = {}
+    for key, reducer, missing in (
+                    ('min', np.minimum, np.inf),
+                    ('max', np.maximum, -np.inf)):
+        values = np.where(np.isnan(table[key]), missing, table[key])
+        extreme = reducer.reduceat(values, starts, axis=0)
+        hit = values == np.repeat(extreme, counts, axis=0)
+        first = np.minimum.reduceat(np.where(hit, rows, far), starts, axis=0)
+        first = np.minimum(first, far - 1)
+        result[key] = np.where(np.isinf(extreme), np.nan, extreme)
+        result[key + '_x'] = np.take_along_axis(
+                                        table[key + '_x'], first, axis=0)
+
+    valid = ~np.isnan(table['last'])
+    last = np.maximum.reduceat(np.where(valid, rows, -1), starts, axis=0)
+    found = last >= 0
+    last = np.maximum(last, 0)
+    result['last'] = np.where(
+                        found,
+                        np.take_along_axis(table['last'], last, axis=0),
+                        np.nan)
+    result['last_x'] = np.take_along_axis(table['last_x'], last, axis=0)
+    return result, ids[starts]
+
+
+class StreamReducer:
+    """
+    Reduces a timeseries read in chunks to min, max and last aggregates
+    of at most 2 * resolution buckets of consecutive rows, plus the
+    first row, in a single pass. When the length is
+    unknown the buckets start with one row
+    and are merged in pairs every time their number doubles, so memory
+    depends on the resolution and the chunk size, not on the length.
+    :param resolution: int, default: 2000
+        minimum number of buckets of the result
+    :param length: int, default: None
+        number of rows, if known, to size the buckets up front
+    """
+
+    def __init__(self, resolution=_default_resolution, length=None):
+        self.resolution = resolution
+        self.width = 1
+        if length is not None:
+            self.width = max(1, -(-length // resolution))
+        self.rows = 0
+        self.columns = None
+        self.dates = False
+        self._table = None
+        self._ids = None
+        # first row, kept as its own point
+        self._first = None
+        self._first_x = None
+
+    def add(self, chunk):
+        """
+        Adds the next rows.
+        :param chunk: pandas dataframe or serie
+            rows of the timeseries, a RangeIndex is read as row numbers
+        """
+
+        if isinstance(chunk, pd.Series):
+            chunk = chunk.to_frame(chunk.name)
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.dates = isinstance(chunk.index, pd.DatetimeIndex)
+
+        n = len(chunk)
+        if n == 0:
+            return
+        positions = self.rows + np.arange(n)
+        if self.dates:
+            x = chunk.index.values.astype('datetime64[ns]').astype('int64')
+        elif isinstance(chunk.index, pd.RangeIndex):
+            x = positions.astype('float64')
+        else:
+            x = np.asarray(chunk.index, dtype='float64')
+        self.rows += n
+
+        values = chunk.to_numpy(dtype='float64')
+        x = np.broadcast_to(x[:, None], values.shape)
+        if self._first is None:
+            self._first = values[0].copy()
+            self._first_x = x[0].copy()
+        table = {
+                'min': values, 'min_x': x,
+                'max': values, 'max_x': x,
+                'last': values, 'last_x': x}
+        table, ids = _reduce(table, positions // self.width)
+
+        if self._table is not None:
+            table = {
+                    key: np.concatenate((self._table[key], table[key]))
+                    for key in table}
+            ids = np.concatenate((self._ids, ids))
+            table, ids = _reduce(table, ids)
+
+        while len(ids) > 2 * self.resolution:
+            self.width *= 2
+            table, ids = _reduce(table, ids // 2)
+
+        self._table = table
+        self._ids = ids
+
+    def result(self, aggregates=('min', 'max', 'last')):
+        """
+        Returns a list with one pandas serie per column, with the
+        first row and the points of every bucket in order.
+        :param aggregates: tuple of str, default: ('min', 'max', 'last')
+            points kept of every bucket
+        """
+
+        series = []
+        if self._table is None:
+            return [pd.Series(dtype='float64', name=name)
+                    for name in self.columns or []]
+
+        for i, name in enumerate(self.columns):
+            x = np.concatenate([self._first_x[i:i + 1]] + [
+                        self._table[key + '_x'][:, i]
+                        for key in aggregates])
+            y = np.concatenate([self._first[i:i + 1]] + [
+                        self._table[key][:, i]
+                        for key in aggregates])
+            keep = ~np.isnan(y)
+            x = x[keep]
+            y = y[keep]
+            x, first = np.unique(x, return_index=True)
+            y = y[first]
+            if self.dates:
+                index = pd.DatetimeIndex(x.astype('datetime64[ns]'))
+            else:
+                index = pd.Index(x)
+            series.append(pd.Series(y, index=index, name=name))
+        return series
+
+
+def is_stream(source):
+    """
+    True if source is a parquet path, a numpy array or an iterator of
+    chunks, False if it is an in memory pandas object.
+    Raises TypeError for anything else.
+    """
+
+    if isinstance(source, (pd.Series, pd.DataFrame)):
+        return False
+    if (has_length(source) or
+            isinstance(source, collections.abc.Iterator)):
+        return True
+    raise TypeError(
+            'data must be a pandas dataframe or serie, the path of a '
+            'parquet file, a numpy array or an iterator of dataframe '
+            'chunks, got {}'.format(type(source).__name__))
+
+
+def has_length(source):
+    """
+    True if the length of a source is known before reading it,
+    for parquet paths and numpy arrays.
+    """
+
+    return (isinstance(source, (str, np.ndarray)) or
+            hasattr(source, '__fspath__'))
+
+
+def _chunks(source):
+    """
+    Yields the chunks of a source and returns its length if known,
+    as (length, chunks).
+    """
+
+    if isinstance(source, str) or hasattr(source, '__fspath__'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(
+                    'Reading parquet files requires pyarrow, '
+                    'install it with: pip install pyarrow') from None
+        parquet = pq.ParquetFile(source)
+        batches = parquet.iter_batches(batch_size=_chunk_rows)
+        return (
+                parquet.metadata.num_rows,
+                (batch.to_pandas() for batch in batches))
+
+    if isinstance(source, np.ndarray):
+        values = source if source.ndim == 2 else source[:, None]
+        # the RangeIndex of every chunk is read as global row numbers
+        return (
+                len(values),
+                (pd.DataFrame(values[i:i + _chunk_rows])
+                 for i in range(0, len(values), _chunk_rows)))
+
+    return None, iter(source)
+
+
+def reduce_source(source, resolution=_default_resolution,
+                  aggregates=('min', 'max', 'last')):
+    """
+    Reduces a timeseries that does not fit in memory to its first row
+    and the min, max and last points of about resolution buckets,
+    in a single pass.
+    Returns a list with one pandas serie per column.
+    :param source: str, numpy array or iterator
+        path of a parquet file, numpy array (e.g. np.load with
+        mmap_mode='r') with one column per serie, or iterator of
+        pandas dataframes with consecutive chunks of the timeseries
+    :param resolution: int, default: 2000
+        number of buckets
+    :param aggregates: tuple of str, default: ('min', 'max', 'last')
+        points kept of every bucket, any of 'min', 'max' and 'last'
+    """
+
+    length, chunks = _chunks(source)
+    reducer = StreamReducer(resolution, length)
+    for chunk in chunks:
+        reducer.add(chunk)
+    return reducer.result(aggregates)
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+
+_src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+                                                    __file__))), 'src')
+
+# heavy modules that importing fintualistic must not load
+_heavy_modules = ('pandas', 'numpy', 'plotly', 'plotly.express')
+
+
+def _loaded_modules(code):
+    """
+    Runs code in a fresh interpreter and returns the heavy modules
+    loaded when it finishes.
+    """
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+                    [_src] + [p for p in [env.get('PYTHONPATH')] if p])
+    script = (
+        '{}\n'
+        'import sys\n'
+        'print(",".join(name for name in {!r} if name in sys.modules))'
+    ).format(code, _heavy_modules)
+    result = subprocess.run(
+                    [sys.executable, '-c', script],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True)
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+def test_import_is_lazy():
+    assert _loaded_modules('import fintualistic') == []
+
+
+def test_set_headless_is_lazy():
+    code = 'import fintualistic\nfintualistic.set_headless()'
+    assert _loaded_modules(code) == []
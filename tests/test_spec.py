@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import pytest
+
+import fintualistic
+from fintualistic.spec import check
+
+
+fintualistic.set_headless()
+
+
+def _frames():
+    """
+    Returns the data of the cases, by name.
+    """
+
+    random = np.random.default_rng(0)
+    index = pd.date_range('2020-01-01', periods=40, freq='D')
+    values = random.random((40, 3)) + 1
+    return {
+        'dates': pd.DataFrame(values, index, ['a', 'b', 'c']),
+        'tz dates': pd.DataFrame(
+                        values,
+                        index.tz_localize('America/Santiago'),
+                        ['a', 'b', 'c']),
+        'int columns': pd.DataFrame(values, index, [0, 1, 2]),
+        'nans': pd.DataFrame(values, index, ['a', 'b', 'c']).mask(
+                                                        values < 1.3),
+        'serie': pd.Series(values[:, 0], index, name='fund')}
+
+
+_plots = [
+    ('plot_series', {}),
+    ('plot_series', {'merge_traces': True}),
+    ('plot_series', {'max_points': 10}),
+    ('plot_bar', {}),
+    ('plot_bar', {'top': 2}),
+    ('plot_area', {}),
+    ('plot_area', {'precompute': True}),
+    ('plot_drawdown', {}),
+    ('plot_rolling', {'window': 5, 'statistic': 'volatility'})]
+
+
+def _html(fig):
+    return pio.to_html(
+                fig, include_plotlyjs=False, div_id='chart', validate=False)
+
+
+@pytest.mark.parametrize('case', list(_frames()))
+@pytest.mark.parametrize(
+            'function, options', _plots,
+            ids=['{}{}'.format(name, options) for name, options in _plots])
+def test_dict_figure_matches_plotly(function, options, case):
+    data = _frames()[case]
+    if function == 'plot_bar':
+        # bars of a few months, nans included
+        data = data.iloc[:6]
+    plot = getattr(fintualistic, function)
+
+    fig = plot(data, save=False, **options)
+    fig_dict = plot(data, save=False, validate=False, **options)
+
+    assert isinstance(fig_dict, dict)
+    assert check(fig_dict) == []
+    assert _html(fig_dict) == _html(fig)
+
+
+def test_check_reports_differences():
+    fig_dict = fintualistic.plot_series(
+                        _frames()['dates'], save=False, validate=False)
+    fig_dict['data'][0] = dict(fig_dict['data'][0], name=1)
+    assert check(fig_dict) == ['trace 0 values']